@@ -0,0 +1,60 @@
+import argparse
+import json
+import timeit
+from typing import Callable, Dict
+import numpy as np
+from services.analytics_service import compute_indicators
+from services.indicators import FloatArray, correlation_matrix, log_returns
+
+
+def vectorized_indicators(prices: FloatArray) -> Dict[str, FloatArray]:
+    return compute_indicators(
+        prices,
+        ["sma", "ema", "log_return", "volatility", "rsi", "drawdown"],
+        [20, 200],
+        [12, 200],
+        21,
+        14,
+    )
+
+
+def make_prices(bars: int, symbols: int, seed: int = 7) -> FloatArray:
+    generator = np.random.default_rng(seed)
+    returns = generator.normal(0.0003, 0.015, size=(symbols, bars))
+    prices: FloatArray = 100.0 * np.exp(np.cumsum(returns, axis=1))
+    return prices
+
+
+def best(function: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the vectorized analytics indicators and correlation matrix."
+    )
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bars = args.years * 252
+    prices = make_prices(bars, args.symbols)
+    sample = prices[0]
+
+    returns = [log_returns(row)[1:] for row in prices]
+    results = {
+        "bars": bars,
+        "symbols": args.symbols,
+        "indicators_ms_per_symbol": round(
+            best(lambda: vectorized_indicators(sample), args.repeat), 3
+        ),
+        "correlation_ms": round(
+            best(lambda: correlation_matrix(returns), args.repeat), 3
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import httpx
+from benchmarks.bench_load import (
+    RequestSpec,
+    build_scenarios,
+    free_port,
+    git_commit,
+    start_server,
+    start_upstream_stub,
+    stop_processes,
+    wait_ready,
+)
+
+MODES = {"eager": "false", "lazy": "true"}
+HEAVY_MODULES = ("sqlalchemy", "sqlmodel", "httpx", "requests", "numpy", "uvicorn")
+IMPORT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+STARTUP_TIMEOUT = 60.0
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result: Dict[str, Any] = json.loads(output.strip().splitlines()[-1])
+    return result
+
+
+async def _wait_listening(port: int, process: "subprocess.Popen[bytes]") -> None:
+    # Only opens a TCP connection, so no application code runs before the
+    # measured request.
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.005)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return
+    raise RuntimeError(f"Server did not start within {STARTUP_TIMEOUT} seconds")
+
+
+async def measure_first_response(
+    env: Dict[str, str], spec: RequestSpec, timeout: float
+) -> Dict[str, Any]:
+    method, path, params, headers = spec
+    port = free_port()
+    started = time.perf_counter()
+    server = start_server(port, env)
+    try:
+        await _wait_listening(port, server)
+        listening = time.perf_counter()
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=timeout
+        ) as client:
+            response = await client.request(
+                method, path, params=params, headers=headers
+            )
+        finished = time.perf_counter()
+    finally:
+        stop_processes([server])
+    return {
+        "status": response.status_code,
+        "boot_ms": (listening - started) * 1000,
+        "first_request_ms": (finished - listening) * 1000,
+        "time_to_first_response_ms": (finished - started) * 1000,
+    }
+
+
+def _summary(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        "statuses": sorted({run["status"] for run in runs}),
+    }
+    for key in ("boot_ms", "first_request_ms", "time_to_first_response_ms"):
+        values = [run[key] for run in runs]
+        summary[key] = {
+            "median": round(statistics.median(values), 1),
+            "min": round(min(values), 1),
+        }
+    return summary
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp()
+    seeded_database = os.path.join(directory, "seeded.db")
+    run_database = os.path.join(directory, "run.db")
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    env = dict(os.environ)
+    env.update(
+        {
+            "API_KEY": "benchmark",
+            "FINANCIAL_API_BASE_URL": stub_url,
+            "TWELVE_DATA_BASE_URL": stub_url,
+            "DATABASE_URL": f"sqlite:///{run_database}",
+        }
+    )
+
+    results: Dict[str, Any] = {"import": {}, "endpoints": {}}
+    for mode, lazy in MODES.items():
+        runs = [
+            measure_import({**env, "LAZY_STARTUP": lazy}) for _ in range(args.repeat)
+        ]
+        results["import"][mode] = {
+            "median_ms": round(statistics.median(run["ms"] for run in runs), 1),
+            "min_ms": round(min(run["ms"] for run in runs), 1),
+            "loaded": runs[0]["loaded"],
+        }
+
+    stub = start_upstream_stub(args, stub_port, env)
+    try:
+        await wait_ready(f"{stub_url}/", stub)
+
+        # Deployment step: create the schema and load the stock listing once,
+        # then start every measured server from a copy of that database.
+        seed_port = free_port()
+        seed_env = {**env, "DATABASE_URL": f"sqlite:///{seeded_database}"}
+        server = start_server(seed_port, seed_env)
+        try:
+            await wait_ready(f"http://127.0.0.1:{seed_port}/", server)
+            async with httpx.AsyncClient(timeout=args.timeout) as client:
+                response = await client.post(f"http://127.0.0.1:{seed_port}/stocks")
+                response.raise_for_status()
+        finally:
+            stop_processes([server])
+
+        selected = set(args.endpoints.split(",")) if args.endpoints else None
+        for scenario in build_scenarios(args):
+            if selected is not None and scenario.name not in selected:
+                continue
+            spec = scenario.make_request(random.Random(f"{args.seed}:{scenario.name}"))
+            results["endpoints"][scenario.name] = {}
+            for mode, lazy in MODES.items():
+                runs = []
+                for _ in range(args.repeat):
+                    shutil.copyfile(seeded_database, run_database)
+                    runs.append(
+                        await measure_first_response(
+                            {**env, "LAZY_STARTUP": lazy}, spec, args.timeout
+                        )
+                    )
+                results["endpoints"][scenario.name][mode] = _summary(runs)
+    finally:
+        stop_processes([stub])
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure import time of main:app and time to first response "
+        "of each endpoint from a fresh process, in eager and lazy startup modes."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--endpoints", help="Comma-separated scenario names; all by default."
+    )
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--stocks", type=int, default=20000)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    args = parser.parse_args()
+    args.ingest_requests = 1
+
+    results = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import gzip
+import json
+import random
+import timeit
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+from models.historical_price import HistoricalPriceResponse
+from services.historical_price_format import (
+    bars_from_columns,
+    columns_from_bars,
+    to_binary,
+    to_columnar_json,
+)
+
+
+def make_bars(count: int) -> List[Dict[str, Any]]:
+    bars = []
+    day = date(2024, 1, 1)
+    price = 100.0
+    for _ in range(count):
+        change = random.gauss(0, 1)
+        price = max(price + change, 1.0)
+        volume = random.randint(1_000_000, 50_000_000)
+        bars.append(
+            {
+                "date": day.isoformat(),
+                "open": round(price - change, 4),
+                "high": round(price + abs(change), 4),
+                "low": round(price - abs(change) * 2, 4),
+                "close": round(price, 4),
+                "adjClose": round(price, 4),
+                "change": round(change, 4),
+                "changeOverTime": round(change / price, 6),
+                "changePercent": round(change / price * 100, 4),
+                "unadjustedVolume": volume,
+                "volume": volume,
+                "vwap": round(price + change / 3, 4),
+                "label": day.strftime("%B %d, %y"),
+            }
+        )
+        day -= timedelta(days=1)
+    return bars
+
+
+def row_json(symbol: str, bars: List[Dict[str, Any]]) -> bytes:
+    response = HistoricalPriceResponse.model_validate(
+        {"symbol": symbol, "historical": bars}
+    )
+    return json.dumps(response.model_dump(mode="json")).encode()
+
+
+def measure(function: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    payload = function()
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    return {
+        "ms": round(seconds * 1000, 3),
+        "bytes": len(payload),
+        "gzip_bytes": len(gzip.compress(payload)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare /historical-price response formats."
+    )
+    parser.add_argument("--bars", type=int, nargs="+", default=[252, 2520, 7560])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for count in args.bars:
+        bars = make_bars(count)
+        columns = columns_from_bars(bars)
+        results[count] = {
+            "row_json": measure(lambda: row_json("AAPL", bars), args.repeat),
+            "row_json_from_columns": measure(
+                lambda: row_json("AAPL", bars_from_columns(columns)), args.repeat
+            ),
+            "columnar_json": measure(
+                lambda: to_columnar_json("AAPL", columns), args.repeat
+            ),
+            "binary": measure(lambda: to_binary("AAPL", columns), args.repeat),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
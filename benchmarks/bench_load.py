@@ -0,0 +1,418 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import httpx
+import psutil
+from benchmarks.bench_stock_catalog import QUERIES
+from benchmarks.upstream_stub import MISSING_SYMBOL_PREFIX
+
+END_DATE = date(2024, 6, 28)
+STARTUP_TIMEOUT = 60.0
+MEMORY_SAMPLE_SECONDS = 0.02
+
+RequestSpec = Tuple[str, str, Dict[str, Any], Dict[str, str]]
+
+
+class Scenario(NamedTuple):
+    name: str
+    make_request: Callable[[random.Random], RequestSpec]
+    requests: Optional[int] = None
+    concurrency: Optional[int] = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_scenarios(args: argparse.Namespace) -> List[Scenario]:
+    symbols = [f"SYM{index:03d}" for index in range(args.symbols)]
+    windows = [args.days // 4, args.days // 2, args.days]
+
+    def date_range(rng: random.Random) -> Dict[str, str]:
+        days = rng.choice(windows)
+        return {
+            "date_start": (END_DATE - timedelta(days=days)).isoformat(),
+            "date_end": END_DATE.isoformat(),
+        }
+
+    def historical(accept: str) -> Callable[[random.Random], RequestSpec]:
+        def make_request(rng: random.Random) -> RequestSpec:
+            params = {"symbol": rng.choice(symbols), **date_range(rng)}
+            return "GET", "/historical-price", params, {"Accept": accept}
+
+        return make_request
+
+    def batch(rng: random.Random) -> RequestSpec:
+        chosen = rng.sample(symbols, min(args.batch_size, len(symbols)))
+        if rng.random() < 0.1:
+            chosen.append(f"{MISSING_SYMBOL_PREFIX}{rng.randint(0, 9)}")
+        params = {"symbols": ",".join(chosen), **date_range(rng)}
+        return "GET", "/historical-price/batch", params, {}
+
+    def analytics(rng: random.Random) -> RequestSpec:
+        chosen = rng.sample(symbols, min(3, len(symbols)))
+        params = {"symbols": ",".join(chosen), **date_range(rng)}
+        return "GET", "/analytics", params, {}
+
+    def search_ticker(rng: random.Random) -> RequestSpec:
+        query = "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=rng.randint(1, 3)))
+        return "GET", "/search-ticker", {"query": query}, {}
+
+    def stock_search(rng: random.Random) -> RequestSpec:
+        query = {key: value for key, value in rng.choice(QUERIES).items() if value}
+        return "GET", "/stock-search", query, {}
+
+    def fixed(method: str, path: str) -> Callable[[random.Random], RequestSpec]:
+        return lambda rng: (method, path, {}, {})
+
+    return [
+        Scenario(
+            "stocks-ingest",
+            fixed("POST", "/stocks"),
+            requests=args.ingest_requests,
+            concurrency=1,
+        ),
+        Scenario("root", fixed("GET", "/")),
+        Scenario("historical-price", historical("application/json")),
+        Scenario(
+            "historical-price-columnar",
+            historical("application/vnd.financial-api.columnar+json"),
+        ),
+        Scenario(
+            "historical-price-binary",
+            historical("application/vnd.financial-api.columnar+binary"),
+        ),
+        Scenario("historical-price-batch", batch),
+        Scenario("analytics", analytics),
+        Scenario("search-ticker", search_ticker),
+        Scenario("search-ticker-stats", fixed("GET", "/search-ticker/stats")),
+        Scenario("stock-search", stock_search),
+        Scenario("country-data", fixed("GET", "/country-data")),
+    ]
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def _sample_memory(
+    process: psutil.Process, samples: List[int], stop: asyncio.Event
+) -> None:
+    while not stop.is_set():
+        try:
+            samples.append(process.memory_info().rss)
+        except psutil.Error:
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), MEMORY_SAMPLE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    process: psutil.Process,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    specs = [scenario.make_request(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+    received = 0
+    position = 0
+
+    async def worker() -> None:
+        nonlocal errors, received, position
+        while position < len(specs):
+            method, path, params, headers = specs[position]
+            position += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    method, path, params=params, headers=headers
+                )
+            except httpx.HTTPError as error:
+                errors += 1
+                key = type(error).__name__
+            else:
+                received += len(response.content)
+                key = str(response.status_code)
+                if response.status_code >= 500:
+                    errors += 1
+            latencies.append(time.perf_counter() - started)
+            status_codes[key] = status_codes.get(key, 0) + 1
+
+    memory: List[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_memory(process, memory, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    ordered = sorted(latencies)
+    megabyte = 1024 * 1024
+    return {
+        "requests": len(specs),
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_codes": status_codes,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(specs) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(_percentile(ordered, 50) * 1000, 2),
+            "p95": round(_percentile(ordered, 95) * 1000, 2),
+            "p99": round(_percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+        "response_bytes_mean": round(received / len(specs)) if specs else 0,
+        "memory_mb": {
+            "start": round(memory[0] / megabyte, 1) if memory else None,
+            "peak": round(max(memory) / megabyte, 1) if memory else None,
+            "end": round(memory[-1] / megabyte, 1) if memory else None,
+        },
+    }
+
+
+def start_upstream_stub(
+    args: argparse.Namespace, port: int, env: Dict[str, str]
+) -> "subprocess.Popen[bytes]":
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.upstream_stub",
+            "--port",
+            str(port),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            str(args.jitter_ms),
+            "--stocks",
+            str(args.stocks),
+            "--tickers",
+            str(args.tickers),
+            "--seed",
+            str(args.seed),
+        ],
+        env=env,
+    )
+
+
+def start_server(port: int, env: Dict[str, str]) -> "subprocess.Popen[bytes]":
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+def stop_processes(processes: List["subprocess.Popen[bytes]"]) -> None:
+    for running in reversed(processes):
+        running.terminate()
+        try:
+            running.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            running.kill()
+
+
+async def wait_ready(url: str, process: subprocess.Popen[bytes]) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not start within {STARTUP_TIMEOUT} seconds")
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp()
+    stub_port, app_port = free_port(), free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    env = dict(os.environ)
+    env.update(
+        {
+            "API_KEY": "benchmark",
+            "FINANCIAL_API_BASE_URL": stub_url,
+            "TWELVE_DATA_BASE_URL": stub_url,
+            "DATABASE_URL": args.database_url or f"sqlite:///{directory}/bench.db",
+        }
+    )
+    processes = []
+    try:
+        stub = start_upstream_stub(args, stub_port, env)
+        processes.append(stub)
+        await wait_ready(f"{stub_url}/", stub)
+
+        server = start_server(app_port, env)
+        processes.append(server)
+        await wait_ready(f"{app_url}/", server)
+        process = psutil.Process(server.pid)
+
+        selected = set(args.endpoints.split(",")) if args.endpoints else None
+        limits = httpx.Limits(max_connections=args.concurrency)
+        results: Dict[str, Any] = {}
+        async with httpx.AsyncClient(
+            base_url=app_url, limits=limits, timeout=args.timeout
+        ) as client:
+            if selected is not None and "stocks-ingest" not in selected:
+                (await client.post("/stocks")).raise_for_status()
+            for scenario in build_scenarios(args):
+                if selected is not None and scenario.name not in selected:
+                    continue
+                results[scenario.name] = await run_scenario(
+                    client,
+                    process,
+                    scenario,
+                    scenario.requests or args.requests,
+                    scenario.concurrency or args.concurrency,
+                    args.seed,
+                )
+    finally:
+        stop_processes(processes)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "endpoints": results,
+    }
+
+
+def compare_results(
+    previous: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    regressions = []
+    print(f"{'endpoint':28} {'rps':>18} {'p95 ms':>22}")
+    for name, result in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+        rps_change = _change(before["throughput_rps"], result["throughput_rps"])
+        p95_change = _change(before["latency_ms"]["p95"], result["latency_ms"]["p95"])
+        print(
+            f"{name:28} "
+            f"{before['throughput_rps']:>7} -> {result['throughput_rps']:<7} "
+            f"{before['latency_ms']['p95']:>8} -> {result['latency_ms']['p95']:<8} "
+            f"({p95_change:+.0%})"
+        )
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the API against local upstream stand-ins and measure "
+        "throughput, latency percentiles and memory per endpoint."
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ingest-requests", type=int, default=3)
+    parser.add_argument(
+        "--endpoints", help="Comma-separated scenario names; all by default."
+    )
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--stocks", type=int, default=20000)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--database-url",
+        help="Database for the API under test; a fresh SQLite file by default.",
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    parser.add_argument(
+        "--compare", help="Previous JSON results to compare this run against."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative p95 or throughput change reported as a regression.",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        regressions = compare_results(previous, results, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
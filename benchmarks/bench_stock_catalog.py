@@ -0,0 +1,136 @@
+import argparse
+import json
+import random
+import string
+import tempfile
+import timeit
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlmodel import Session
+from database import create_database_engine, migrate
+from models.stock_data import StockData
+from services.stock_catalog import load_stock_catalog
+from services.stock_data_service import query_stock_list
+
+COUNTRIES = [
+    "United States",
+    "United Kingdom",
+    "Germany",
+    "Canada",
+    "India",
+    "China",
+    "Japan",
+    "France",
+    "Poland",
+    "Brazil",
+]
+WORDS = ["Apple", "Global", "Holdings", "Bank", "Energy", "Tech", "Pharma", "Group"]
+
+QUERIES: List[Dict[str, Optional[str]]] = [
+    {"symbol": "A"},
+    {"symbol": "AAP"},
+    {"name": "hold"},
+    {"name": "pple gl"},
+    {"country": "United"},
+    {"country": "Germany", "exchange": "XETR"},
+    {"country": "United", "symbol": "Q", "name": "bank"},
+]
+
+
+def make_listing(
+    count: int, rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
+    rng = rng or random.Random()
+    listing = []
+    for _ in range(count):
+        country = rng.choice(COUNTRIES)
+        exchange = f"X{country[:3].upper()}{rng.randint(0, 3)}"
+        listing.append(
+            {
+                "symbol": "".join(
+                    rng.choices(string.ascii_uppercase, k=rng.randint(1, 5))
+                ),
+                "name": " ".join(rng.choices(WORDS, k=rng.randint(2, 4))),
+                "currency": "USD",
+                "exchange": exchange,
+                "mic_code": exchange,
+                "country": country,
+                "type": "Common Stock",
+            }
+        )
+    return listing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the in-memory stock catalog against the SQL path."
+    )
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--database-url",
+        help="Existing database with a stockdata table; a SQLite file is used "
+        "with synthetic rows by default.",
+    )
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_database_engine(args.database_url)
+    else:
+        directory = tempfile.mkdtemp()
+        engine = create_database_engine(f"sqlite:///{directory}/catalog.db")
+        migrate(engine)
+        with Session(engine) as session:
+            session.execute(insert(StockData), make_listing(args.rows))
+            session.commit()
+
+    build_seconds = min(
+        timeit.repeat(lambda: load_stock_catalog(engine), number=1, repeat=3)
+    )
+    catalog = load_stock_catalog(engine)
+
+    results: Dict[str, Any] = {
+        "rows": catalog.size,
+        "catalog_build_ms": round(build_seconds * 1000, 1),
+        "queries": [],
+    }
+    with Session(engine) as session:
+        for query in QUERIES:
+            filters = [query.get(key) for key in ("country", "exchange", "symbol")]
+            filters.append(query.get("name"))
+
+            def sql() -> Any:
+                try:
+                    return query_stock_list(session, *filters)
+                except HTTPException:
+                    # query_stock_list reports "no rows" as a 404.
+                    return []
+
+            sql_seconds = min(timeit.repeat(sql, number=1, repeat=args.repeat))
+            search_seconds = min(
+                timeit.repeat(
+                    lambda: catalog.search(*filters), number=1, repeat=args.repeat
+                )
+            )
+            rows_seconds = min(
+                timeit.repeat(
+                    lambda: catalog.rows(catalog.search(*filters)),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            results["queries"].append(
+                {
+                    "query": query,
+                    "matches": len(catalog.search(*filters)),
+                    "sql_ms": round(sql_seconds * 1000, 3),
+                    "catalog_search_us": round(search_seconds * 1e6, 1),
+                    "catalog_rows_ms": round(rows_seconds * 1000, 3),
+                }
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
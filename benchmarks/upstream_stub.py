@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import random
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import uvicorn
+from fastapi import FastAPI, Query, Response
+from benchmarks.bench_stock_catalog import make_listing
+
+TICKER_EXCHANGES = ["NASDAQ", "NYSE", "AMEX", "LSE", "XETRA"]
+MISSING_SYMBOL_PREFIX = "MISSING"
+
+
+def make_tickers(
+    count: int, rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
+    tickers = []
+    for index, listing in enumerate(make_listing(count, rng)):
+        exchange = TICKER_EXCHANGES[index % len(TICKER_EXCHANGES)]
+        tickers.append(
+            {
+                "symbol": listing["symbol"],
+                "name": listing["name"],
+                "currency": listing["currency"],
+                "stockExchange": exchange,
+                "exchangeShortName": exchange,
+            }
+        )
+    return tickers
+
+
+def make_historical_bars(symbol: str, start: date, end: date) -> List[Dict[str, Any]]:
+    # Bars are seeded by symbol and day, so overlapping ranges of one symbol
+    # return the same bars, as they would from the real API.
+    bars = []
+    day = end
+    while day >= start:
+        if day.weekday() < 5:
+            generator = random.Random(zlib.crc32(f"{symbol}:{day}".encode()))
+            close = 50 + (zlib.crc32(symbol.encode()) % 200) + generator.gauss(0, 5)
+            change = generator.gauss(0, 1)
+            volume = generator.randint(1_000_000, 50_000_000)
+            bars.append(
+                {
+                    "date": day.isoformat(),
+                    "open": round(close - change, 4),
+                    "high": round(close + abs(change), 4),
+                    "low": round(close - abs(change) * 2, 4),
+                    "close": round(close, 4),
+                    "adjClose": round(close, 4),
+                    "volume": volume,
+                    "unadjustedVolume": volume,
+                    "change": round(change, 4),
+                    "changePercent": round(change / close * 100, 4),
+                    "vwap": round(close - change / 2, 4),
+                    "label": day.strftime("%B %d, %y"),
+                    "changeOverTime": round(change / close, 6),
+                }
+            )
+        day -= timedelta(days=1)
+    return bars
+
+
+def create_stub_app(
+    latency_ms: float = 50,
+    jitter_ms: float = 10,
+    stocks: int = 20000,
+    tickers: int = 2000,
+    seed: Optional[int] = 1,
+) -> FastAPI:
+    # A local generator, so building the app does not reseed the global one
+    # that retry backoff and other code in the process draw from.
+    rng = random.Random(seed)
+    ticker_list = make_tickers(tickers, rng)
+    stock_payload = json.dumps(
+        {"data": make_listing(stocks, rng), "count": stocks, "status": "ok"}
+    ).encode()
+    app = FastAPI()
+
+    async def delay() -> None:
+        await asyncio.sleep(
+            max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        )
+
+    @app.get("/")
+    async def health() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/historical-price-full/{symbol}")
+    async def historical_price_full(
+        symbol: str,
+        date_from: str = Query(..., alias="from"),
+        date_to: str = Query(..., alias="to"),
+    ) -> Response:
+        await delay()
+        if symbol.upper().startswith(MISSING_SYMBOL_PREFIX):
+            return Response(status_code=404)
+        bars = make_historical_bars(
+            symbol, date.fromisoformat(date_from), date.fromisoformat(date_to)
+        )
+        content = {"symbol": symbol, "historical": bars} if bars else {}
+        return Response(json.dumps(content), media_type="application/json")
+
+    @app.get("/search-ticker")
+    async def search_ticker(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        await delay()
+        lowered = query.lower()
+        return [
+            ticker
+            for ticker in ticker_list
+            if lowered in ticker["symbol"].lower() or lowered in ticker["name"].lower()
+        ][:limit]
+
+    @app.get("/stocks")
+    async def stock_list() -> Response:
+        await delay()
+        return Response(stock_payload, media_type="application/json")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve local stand-ins for the Financial Modeling Prep and "
+        "Twelve Data endpoints used by the API."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--stocks", type=int, default=20000)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_stub_app(
+        args.latency_ms, args.jitter_ms, args.stocks, args.tickers, args.seed
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,70 @@ TWELVE_DATA_BASE_URL = os.getenv("TWELVE_DATA_BASE_URL")
 DATABASE_HOST = os.getenv("DATABASE_HOST")
 DATABASE_USER = os.getenv("DATABASE_USER")
 DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD")
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}",
+)
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+DATABASE_AUTO_MIGRATE = os.getenv("DATABASE_AUTO_MIGRATE", "true").lower() == "true"
+
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "200"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "50")
+)
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_RETRY_BACKOFF = float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.2"))
+
+HISTORICAL_PRICE_STORE_ENABLED = (
+    os.getenv("HISTORICAL_PRICE_STORE_ENABLED", "true").lower() == "true"
+)
+HISTORICAL_PRICE_FRESHNESS_SECONDS = int(
+    os.getenv("HISTORICAL_PRICE_FRESHNESS_SECONDS", "300")
+)
+HISTORICAL_PRICE_UPSTREAM_CONCURRENCY = int(
+    os.getenv("HISTORICAL_PRICE_UPSTREAM_CONCURRENCY", "16")
+)
+HISTORICAL_PRICE_BATCH_MAX_SYMBOLS = int(
+    os.getenv("HISTORICAL_PRICE_BATCH_MAX_SYMBOLS", "100")
+)
+
+STOCK_INGEST_BATCH_SIZE = int(os.getenv("STOCK_INGEST_BATCH_SIZE", "5000"))
+STOCK_INGEST_CHUNK_SIZE = int(os.getenv("STOCK_INGEST_CHUNK_SIZE", "65536"))
+
+ANALYTICS_PERIODS_PER_YEAR = int(os.getenv("ANALYTICS_PERIODS_PER_YEAR", "252"))
+
+TICKER_SEARCH_LIMIT = int(os.getenv("TICKER_SEARCH_LIMIT", "100"))
+TICKER_CACHE_MAX_ENTRIES = int(os.getenv("TICKER_CACHE_MAX_ENTRIES", "10000"))
+TICKER_CACHE_MAX_BYTES = int(os.getenv("TICKER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+TICKER_CACHE_TTL_SECONDS = float(os.getenv("TICKER_CACHE_TTL_SECONDS", "3600"))
+
+STOCK_SEARCH_MAX_LIMIT = int(os.getenv("STOCK_SEARCH_MAX_LIMIT", "10000"))
+STOCK_STREAM_BATCH_SIZE = int(os.getenv("STOCK_STREAM_BATCH_SIZE", "1000"))
+STOCK_CATALOG_CHECK_SECONDS = float(os.getenv("STOCK_CATALOG_CHECK_SECONDS", "60"))
+CATALOG_RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.getenv("CATALOG_RESPONSE_CACHE_MAX_ENTRIES", "256")
+)
+CATALOG_RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("CATALOG_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+CATALOG_COMPRESSION_MIN_BYTES = int(os.getenv("CATALOG_COMPRESSION_MIN_BYTES", "1024"))
+CATALOG_CACHE_CONTROL = os.getenv(
+    "CATALOG_CACHE_CONTROL",
+    "public, max-age=0, s-maxage=60, stale-while-revalidate=60",
+)
+
+LAZY_STARTUP = (
+    os.getenv("LAZY_STARTUP", "true" if os.getenv("VERCEL") else "false").lower()
+    == "true"
+)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
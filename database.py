@@ -0,0 +1,81 @@
+import threading
+from typing import Any, Dict, Iterator, Optional
+from sqlalchemy import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+from config import (
+    DATABASE_AUTO_MIGRATE,
+    DATABASE_ECHO,
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_URL,
+)
+from metrics import instrument_engine
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def create_database_engine(url: str = DATABASE_URL) -> Engine:
+    options: Dict[str, Any] = {"echo": DATABASE_ECHO, "pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url or url in ("sqlite://", "sqlite:///"):
+            options["poolclass"] = StaticPool
+    else:
+        options.update(
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+        )
+    engine = create_engine(url, **options)
+    instrument_engine(engine)
+    return engine
+
+
+def get_engine() -> Engine:
+    global _engine
+    engine = _engine
+    if engine is not None:
+        return engine
+    # With lazy startup the first requests can reach this from several
+    # threadpool threads at once; only one of them creates the engine.
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_database_engine()
+        return _engine
+
+
+def set_engine(engine: Optional[Engine]) -> None:
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    if previous is not None and previous is not engine:
+        previous.dispose()
+
+
+def dispose_engine() -> None:
+    set_engine(None)
+
+
+def migrate(engine: Optional[Engine] = None) -> None:
+    import models.catalog_version  # noqa: F401
+    import models.historical_price_bar  # noqa: F401
+    import models.stock_data  # noqa: F401
+
+    SQLModel.metadata.create_all(engine or get_engine())
+
+
+def init_database() -> Engine:
+    engine = get_engine()
+    if DATABASE_AUTO_MIGRATE:
+        migrate(engine)
+    return engine
+
+
+def get_session() -> Iterator[Session]:
+    with Session(get_engine()) as session:
+        yield session
@@ -1,17 +1,97 @@
-from typing import Dict, List, Optional, Union
-from fastapi import FastAPI, Query, Response
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import ColumnElement
+from starlette.concurrency import run_in_threadpool
+from config import LAZY_STARTUP, METRICS_ENABLED, STOCK_SEARCH_MAX_LIMIT
+from metrics import (
+    PROMETHEUS_MEDIA_TYPE,
+    MetricsMiddleware,
+    TimedRoute,
+    render_metrics,
+)
+from models.analytics import AnalyticsResponse
 from models.country_data import CountryData
-from models.historical_price import HistoricalPriceResponse
-from models.stock_data import StockData, StockDataInput
-from models.ticker_data import TickerData
-from services.historical_price_service import get_historical_price
-from services.stock_data_service import get_country_data, get_stock_list, set_stock_data
-from services.ticker_service import get_ticker_list
-import uvicorn
+from models.historical_price import (
+    HistoricalPriceBatchResponse,
+    HistoricalPriceResponse,
+)
+from models.stock_ingest_report import StockIngestReport
+from models.stock_listing import StockListing
+from models.ticker_data import TickerCacheStats, TickerData
+from services.historical_price_format import (
+    BINARY_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    negotiate_media_type,
+)
+
+if TYPE_CHECKING:
+    from sqlmodel import Session
+    from services.upstream_client import UpstreamClient
+
+# Service modules pull in SQLAlchemy, httpx, requests and NumPy, so they are
+# imported by the handlers that use them. In the default mode the lifespan
+# imports them and initializes the database, catalog and client up front;
+# with LAZY_STARTUP (serverless) each is set up by the first request that
+# needs it and the schema is left to `python migrate.py`.
+SERVICE_MODULES = (
+    "services.analytics_service",
+    "services.historical_price_service",
+    "services.stock_data_service",
+    "services.ticker_service",
+)
+
+
+def _start_services() -> None:
+    from importlib import import_module
+    from database import init_database
+    from services.stock_catalog import refresh_stock_catalog
+
+    for module in SERVICE_MODULES:
+        import_module(module)
+    init_database()
+    refresh_stock_catalog()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if not LAZY_STARTUP:
+        await run_in_threadpool(_start_services)
+        await get_upstream_client()
+    yield
+    from database import dispose_engine
+    from services.upstream_client import close_upstream_client
+
+    await close_upstream_client()
+    dispose_engine()
+
+
+async def get_upstream_client() -> "UpstreamClient":
+    # An async dependency runs on the event loop, so the async handlers that
+    # use it do not take a threadpool hop per request.
+    from services.upstream_client import get_upstream_client
+
+    return get_upstream_client()
 
-app = FastAPI(title="Financial Analysis")
+
+def get_session() -> Iterator["Session"]:
+    from database import get_session
+
+    yield from get_session()
+
+
+app = FastAPI(title="Financial Analysis", lifespan=lifespan)
+app.router.route_class = TimedRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,16 +101,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/")
 async def read_root() -> Dict[str, str]:
     return {"Health": "OK"}
 
 
+@app.get("/metrics", include_in_schema=METRICS_ENABLED)
+def handle_metrics_request() -> Response:
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(render_metrics(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
 @app.get(
-    "/historical-price", response_model=Union[HistoricalPriceResponse, Dict[None, None]]
+    "/historical-price",
+    response_model=Union[HistoricalPriceResponse, Dict[None, None]],
+    responses={
+        200: {
+            "content": {
+                COLUMNAR_JSON_MEDIA_TYPE: {},
+                BINARY_MEDIA_TYPE: {},
+            }
+        }
+    },
 )
-def handle_historical_price_request(
+async def handle_historical_price_request(
+    response: Response,
     symbol: str = Query(
         ..., title="Symbol", description="Symbol of the financial instrument."
     ),
@@ -40,24 +140,136 @@ def handle_historical_price_request(
     date_end: str = Query(
         ..., title="End Date", description="End date for historical prices."
     ),
-) -> Union[HistoricalPriceResponse, Dict[None, None]]:
-    return get_historical_price(symbol, date_start, date_end)
+    accept: Optional[str] = Header(
+        None, description="Response format: JSON, columnar JSON or binary columns."
+    ),
+    client: "UpstreamClient" = Depends(get_upstream_client),
+) -> Union[HistoricalPriceResponse, Dict[None, None], Response]:
+    from services.historical_price_service import (
+        get_historical_price,
+        get_historical_price_encoded,
+    )
+
+    media_type = negotiate_media_type(accept)
+    if media_type != JSON_MEDIA_TYPE:
+        return await get_historical_price_encoded(
+            client, symbol, date_start, date_end, media_type
+        )
+    response.headers["Vary"] = "Accept"
+    return await get_historical_price(client, symbol, date_start, date_end)
+
+
+@app.get("/historical-price/batch", response_model=HistoricalPriceBatchResponse)
+async def handle_historical_price_batch_request(
+    symbols: str = Query(
+        ...,
+        title="Symbols",
+        description="Comma separated symbols of the financial instruments.",
+    ),
+    date_start: str = Query(
+        ..., title="Start Date", description="Start date for historical prices."
+    ),
+    date_end: str = Query(
+        ..., title="End Date", description="End date for historical prices."
+    ),
+    client: "UpstreamClient" = Depends(get_upstream_client),
+) -> HistoricalPriceBatchResponse:
+    from services.historical_price_service import get_historical_price_batch
+
+    return await get_historical_price_batch(
+        client, symbols.split(","), date_start, date_end
+    )
+
+
+@app.get("/analytics", response_model=AnalyticsResponse)
+async def handle_analytics_request(
+    symbols: str = Query(
+        ...,
+        title="Symbols",
+        description="Comma separated symbols of the financial instruments.",
+    ),
+    date_start: str = Query(
+        ..., title="Start Date", description="Start date for historical prices."
+    ),
+    date_end: str = Query(
+        ..., title="End Date", description="End date for historical prices."
+    ),
+    indicators: str = Query(
+        "sma,ema,log_return,volatility,rsi,drawdown,correlation",
+        title="Indicators",
+        description="Comma separated indicators: sma, ema, log_return, "
+        "volatility, rsi, drawdown, correlation.",
+    ),
+    sma_windows: str = Query(
+        "20,50", title="SMA Windows", description="Comma separated SMA windows."
+    ),
+    ema_windows: str = Query(
+        "12,26", title="EMA Windows", description="Comma separated EMA windows."
+    ),
+    volatility_window: int = Query(
+        21, ge=2, le=1000, title="Volatility Window", description="Rolling window."
+    ),
+    rsi_window: int = Query(
+        14, ge=1, le=1000, title="RSI Window", description="RSI window."
+    ),
+    price_field: str = Query(
+        "adjClose", title="Price Field", description="adjClose or close."
+    ),
+    client: "UpstreamClient" = Depends(get_upstream_client),
+) -> AnalyticsResponse:
+    from services.analytics_service import (
+        get_analytics,
+        parse_indicators,
+        parse_windows,
+    )
+
+    return await get_analytics(
+        client,
+        symbols.split(","),
+        date_start,
+        date_end,
+        parse_indicators(indicators),
+        parse_windows(sma_windows),
+        parse_windows(ema_windows),
+        volatility_window,
+        rsi_window,
+        price_field,
+    )
 
 
 @app.get("/search-ticker", response_model=List[TickerData])
-def handle_ticker_search_request(
-    query: str = Query(..., title="Query", description="Query for the ticker list.")
-) -> List[TickerData]:
-    return get_ticker_list(query)
+async def handle_ticker_search_request(
+    query: str = Query(..., title="Query", description="Query for the ticker list."),
+    client: "UpstreamClient" = Depends(get_upstream_client),
+) -> List[Dict[str, Any]]:
+    from services.ticker_service import get_ticker_list
+
+    return await get_ticker_list(client, query)
+
+
+@app.get("/search-ticker/stats", response_model=TickerCacheStats)
+async def handle_ticker_cache_stats_request() -> TickerCacheStats:
+    from services.ticker_service import get_ticker_cache_stats
+
+    return get_ticker_cache_stats()
+
 
+@app.post("/stocks", response_model=StockIngestReport)
+def handle_stock_data_create(
+    session: "Session" = Depends(get_session),
+) -> StockIngestReport:
+    from services.stock_data_service import set_stock_data
 
-@app.post("/stocks", response_model=StockDataInput)
-def handle_stock_data_create() -> Response:
-    return set_stock_data()
+    return set_stock_data(session)
 
 
-@app.get("/stock-search", response_model=list[StockData])
+@app.get(
+    "/stock-search",
+    response_model=List[StockListing],
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
 def handle_stock_search_request(
+    request: Request,
     country: Optional[str] = Query(
         None, title="Country", description="Country of the financial instrument."
     ),
@@ -70,14 +282,39 @@ def handle_stock_search_request(
     name: Optional[str] = Query(
         None, title="Name", description="Name for financial instrument."
     ),
-) -> list[StockData]:
-    return get_stock_list(country, exchange, symbol, name)
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=STOCK_SEARCH_MAX_LIMIT,
+        title="Limit",
+        description="Maximum number of rows; the X-Next-Cursor header and Link "
+        "rel=next point to the next page.",
+    ),
+    cursor: Optional[int] = Query(
+        None,
+        ge=0,
+        title="Cursor",
+        description="Return rows with an id greater than this one.",
+    ),
+    accept: Optional[str] = Header(
+        None, description="application/x-ndjson streams one row per line."
+    ),
+) -> Response:
+    from services.stock_data_service import get_stock_list_response
+
+    return get_stock_list_response(
+        request, country, exchange, symbol, name, cursor, limit, accept
+    )
 
 
 @app.get("/country-data", response_model=List[CountryData])
-def handle_country_data_request() -> List[CountryData]:
-    return get_country_data()
+def handle_country_data_request(request: Request) -> Response:
+    from services.stock_data_service import get_country_data_response
+
+    return get_country_data_response(request)
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,388 @@
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import SERVER_TIMING_ENABLED
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+Timings = List[Tuple[str, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(Metric):
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self._callbacks: List[Callable[[], Dict[LabelValues, float]]] = []
+
+    def track(self, callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        self._callbacks.append(callback)
+
+    def samples(self) -> List[str]:
+        values: Dict[LabelValues, float] = {}
+        for callback in self._callbacks:
+            values.update(callback())
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted(
+                (labels, list(counts), self._sums[labels])
+                for labels, counts in self._counts.items()
+            )
+        names = self.labels + ("le",)
+        lines = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests: Counter = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests handled, by route and status code.",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration: Histogram = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency, by route.",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight: Gauge = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+)
+span_duration: Histogram = registry.register(
+    Histogram(
+        "span_duration_seconds",
+        "Time spent in named spans: upstream calls, database queries, "
+        "validation and serialization.",
+        ("span",),
+    )
+)
+upstream_responses: Counter = registry.register(
+    Counter(
+        "upstream_responses_total",
+        "Responses from upstream APIs, by host and status code.",
+        ("upstream", "status"),
+    )
+)
+upstream_requests_in_flight: Gauge = registry.register(
+    Gauge(
+        "upstream_requests_in_flight",
+        "Upstream API requests currently waiting for a response.",
+        ("upstream",),
+    )
+)
+coalesced_requests_in_flight: CallbackGauge = registry.register(
+    CallbackGauge(
+        "coalesced_requests_in_flight",
+        "Distinct in-flight calls shared by concurrent identical requests.",
+        ("flight",),
+    )
+)
+
+_timings: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+_endpoint_finished: ContextVar[Optional[List[float]]] = ContextVar(
+    "endpoint_finished", default=None
+)
+
+
+def record_span(name: str, seconds: float) -> None:
+    span_duration.observe(seconds, name)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def server_timing(timings: Timings, total: float) -> str:
+    durations: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+        counts[name] = counts.get(name, 0) + 1
+    entries = []
+    for name, seconds in durations.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if counts[name] > 1:
+            entry += f';desc="{counts[name]} calls"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def instrument_engine(engine: "Engine") -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, *args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, *args: Any) -> None:
+        record_span("db", time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    def finished(started: float) -> None:
+        now = time.perf_counter()
+        record_span("handler", now - started)
+        marker = _endpoint_finished.get()
+        if marker is not None:
+            marker.append(now)
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def timed_async(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finished(started)
+
+        return timed_async
+
+    @functools.wraps(endpoint)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            finished(started)
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    # The endpoint is timed as the "handler" span; what FastAPI does after it
+    # returns (response model validation and JSON encoding) is "response".
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handle = super().get_route_handler()
+
+        async def handle_timed(request: Request) -> Response:
+            marker: List[float] = []
+            token = _endpoint_finished.set(marker)
+            try:
+                response: Response = await handle(request)
+            finally:
+                _endpoint_finished.reset(token)
+            if marker:
+                record_span("response", time.perf_counter() - marker[-1])
+            return response
+
+        return handle_timed
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Timings = []
+        token = _timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        server_timing(timings, time.perf_counter() - started),
+                    )
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_requests.inc(scope["method"], path, str(status))
+            http_request_duration.observe(
+                time.perf_counter() - started, scope["method"], path
+            )
+
+
+def render_metrics() -> str:
+    return registry.render()
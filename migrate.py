@@ -0,0 +1,5 @@
+from database import dispose_engine, migrate
+
+if __name__ == "__main__":
+    migrate()
+    dispose_engine()
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class SymbolAnalytics(BaseModel):
+    symbol: str
+    status_code: int
+    error: Optional[str] = None
+    date: List[str] = []
+    price: List[float] = []
+    indicators: Dict[str, List[Optional[float]]] = {}
+
+
+class CorrelationMatrix(BaseModel):
+    symbols: List[str]
+    observations: int
+    matrix: List[List[Optional[float]]]
+
+
+class AnalyticsResponse(BaseModel):
+    date_start: str
+    date_end: str
+    price_field: str
+    results: List[SymbolAnalytics]
+    correlation: Optional[CorrelationMatrix] = None
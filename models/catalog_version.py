@@ -0,0 +1,8 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class CatalogVersion(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    version: int
+    updated_at: datetime
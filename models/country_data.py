@@ -1,7 +1,7 @@
 from typing import Optional
-from sqlmodel import SQLModel
+from pydantic import BaseModel
 
 
-class CountryData(SQLModel):
+class CountryData(BaseModel):
     country: Optional[str]
     exchange: Optional[str]
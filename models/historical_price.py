@@ -22,3 +22,15 @@ class HistoricalPriceResponse(BaseModel):
     symbol: Optional[str]
     historical: Optional[List[HistoricalPrice]]
 
+
+class HistoricalPriceBatchItem(BaseModel):
+    symbol: str
+    status_code: int
+    data: Optional[HistoricalPriceResponse] = None
+    error: Optional[str] = None
+
+
+class HistoricalPriceBatchResponse(BaseModel):
+    date_start: str
+    date_end: str
+    results: List[HistoricalPriceBatchItem]
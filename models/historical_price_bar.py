@@ -0,0 +1,28 @@
+from datetime import date, datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class HistoricalPriceBar(SQLModel, table=True):
+    symbol: str = Field(primary_key=True)
+    date: str = Field(primary_key=True)
+    open: float
+    high: float
+    low: float
+    close: float
+    adjClose: float
+    change: float
+    changeOverTime: float
+    changePercent: float
+    unadjustedVolume: int
+    volume: int
+    vwap: float
+    label: str
+
+
+class HistoricalPriceRange(SQLModel, table=True):
+    id: Optional[int] = Field(primary_key=True, default=None)
+    symbol: str = Field(index=True)
+    date_start: date
+    date_end: date
+    fetched_at: datetime
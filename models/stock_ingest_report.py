@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class StockIngestReport(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+    fetch_seconds: float
+    diff_seconds: float
+    write_seconds: float
+    total_seconds: float
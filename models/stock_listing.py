@@ -0,0 +1,13 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class StockListing(BaseModel):
+    id: Optional[int] = None
+    symbol: str
+    name: str
+    currency: str
+    exchange: str
+    mic_code: str
+    country: str
+    type: str
@@ -8,3 +8,16 @@ class TickerData(BaseModel):
     currency: Optional[str]
     stockExchange: Optional[str]
     exchangeShortName: Optional[str]
+
+
+class TickerCacheStats(BaseModel):
+    hits: int
+    prefix_hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
@@ -0,0 +1,225 @@
+from typing import Dict, List, Optional, Tuple, Union
+from fastapi import HTTPException
+import numpy as np
+from numpy.typing import NDArray
+from starlette.concurrency import run_in_threadpool
+from config import ANALYTICS_PERIODS_PER_YEAR
+from metrics import span
+from models.analytics import AnalyticsResponse, CorrelationMatrix, SymbolAnalytics
+from services.historical_price_format import HistoricalPriceColumns
+from services.historical_price_service import (
+    get_historical_columns_batch,
+    validate_batch_request,
+)
+from services.indicators import (
+    FloatArray,
+    correlation_matrix,
+    drawdown,
+    ema,
+    log_returns,
+    rolling_volatility,
+    rsi,
+    sma,
+)
+from services.upstream_client import UpstreamClient
+
+ANALYTICS_INDICATORS = (
+    "sma",
+    "ema",
+    "log_return",
+    "volatility",
+    "rsi",
+    "drawdown",
+    "correlation",
+)
+PRICE_FIELDS = ("adjClose", "close")
+MAX_WINDOW = 1000
+
+DateArray = NDArray[np.datetime64]
+
+
+def parse_indicators(value: str) -> List[str]:
+    indicators = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in indicators if item not in ANALYTICS_INDICATORS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown indicators: {', '.join(unknown)}"
+        )
+    return indicators
+
+
+def parse_windows(value: str) -> List[int]:
+    try:
+        windows = sorted({int(item) for item in value.split(",") if item.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid windows: {value}")
+    if any(window < 1 or window > MAX_WINDOW for window in windows):
+        raise HTTPException(
+            status_code=400, detail=f"Windows must be between 1 and {MAX_WINDOW}"
+        )
+    return windows
+
+
+def _to_list(values: FloatArray) -> List[Optional[float]]:
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return list(result.tolist())
+
+
+def compute_indicators(
+    prices: FloatArray,
+    indicators: List[str],
+    sma_windows: List[int],
+    ema_windows: List[int],
+    volatility_window: int,
+    rsi_window: int,
+    periods_per_year: int = ANALYTICS_PERIODS_PER_YEAR,
+) -> Dict[str, FloatArray]:
+    series: Dict[str, FloatArray] = {}
+    if "sma" in indicators:
+        for window in sma_windows:
+            series[f"sma_{window}"] = sma(prices, window)
+    if "ema" in indicators:
+        for window in ema_windows:
+            series[f"ema_{window}"] = ema(prices, window)
+    if "log_return" in indicators:
+        series["log_return"] = log_returns(prices)
+    if "volatility" in indicators:
+        series[f"volatility_{volatility_window}"] = rolling_volatility(
+            prices, volatility_window, periods_per_year
+        )
+    if "rsi" in indicators:
+        series[f"rsi_{rsi_window}"] = rsi(prices, rsi_window)
+    if "drawdown" in indicators:
+        series["drawdown"] = drawdown(prices)
+    return series
+
+
+def _price_arrays(
+    columns: HistoricalPriceColumns, price_field: str
+) -> Tuple[DateArray, FloatArray]:
+    # Stored bars are newest first; indicators run oldest first.
+    dates = np.array(columns["date"], dtype="datetime64[D]")[::-1]
+    prices = np.asarray(columns[price_field], dtype=np.float64)[::-1]
+    return dates, prices
+
+
+def _correlation(
+    symbols: List[str],
+    series: List[Tuple[DateArray, FloatArray]],
+) -> Optional[CorrelationMatrix]:
+    if len(series) < 2:
+        return None
+    common = series[0][0]
+    for dates, _ in series[1:]:
+        common = np.intersect1d(common, dates, assume_unique=True)
+    returns = [
+        log_returns(prices[np.isin(dates, common, assume_unique=True)])[1:]
+        for dates, prices in series
+    ]
+    observations = len(common) - 1
+    if observations < 2:
+        return CorrelationMatrix(
+            symbols=symbols, observations=max(observations, 0), matrix=[]
+        )
+    matrix = correlation_matrix(returns)
+    return CorrelationMatrix(
+        symbols=symbols,
+        observations=observations,
+        matrix=[_to_list(row) for row in matrix],
+    )
+
+
+def build_analytics(
+    symbols: List[str],
+    results: List[Union[HistoricalPriceColumns, HTTPException]],
+    date_start: str,
+    date_end: str,
+    indicators: List[str],
+    sma_windows: List[int],
+    ema_windows: List[int],
+    volatility_window: int,
+    rsi_window: int,
+    price_field: str,
+) -> AnalyticsResponse:
+    items: List[SymbolAnalytics] = []
+    correlated_symbols: List[str] = []
+    correlated_series = []
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, HTTPException):
+            items.append(
+                SymbolAnalytics(
+                    symbol=symbol, status_code=result.status_code, error=result.detail
+                )
+            )
+            continue
+        if not result:
+            items.append(
+                SymbolAnalytics(
+                    symbol=symbol, status_code=404, error="No data found for the symbol"
+                )
+            )
+            continue
+        dates, prices = _price_arrays(result, price_field)
+        series = compute_indicators(
+            prices, indicators, sma_windows, ema_windows, volatility_window, rsi_window
+        )
+        items.append(
+            SymbolAnalytics(
+                symbol=symbol,
+                status_code=200,
+                date=np.datetime_as_string(dates).tolist(),
+                price=prices.tolist(),
+                indicators={name: _to_list(values) for name, values in series.items()},
+            )
+        )
+        correlated_symbols.append(symbol)
+        correlated_series.append((dates, prices))
+
+    correlation = None
+    if "correlation" in indicators:
+        correlation = _correlation(correlated_symbols, correlated_series)
+    return AnalyticsResponse(
+        date_start=date_start,
+        date_end=date_end,
+        price_field=price_field,
+        results=items,
+        correlation=correlation,
+    )
+
+
+async def get_analytics(
+    client: UpstreamClient,
+    symbols: List[str],
+    date_start: str,
+    date_end: str,
+    indicators: List[str],
+    sma_windows: List[int],
+    ema_windows: List[int],
+    volatility_window: int,
+    rsi_window: int,
+    price_field: str,
+) -> AnalyticsResponse:
+    if price_field not in PRICE_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Price field must be one of {', '.join(PRICE_FIELDS)}",
+        )
+    unique_symbols = validate_batch_request(symbols, date_start, date_end)
+    results = await get_historical_columns_batch(
+        client, unique_symbols, date_start, date_end
+    )
+    with span("compute"):
+        return await run_in_threadpool(
+            build_analytics,
+            unique_symbols,
+            results,
+            date_start,
+            date_end,
+            indicators,
+            sma_windows,
+            ema_windows,
+            volatility_window,
+            rsi_window,
+            price_field,
+        )
@@ -0,0 +1,230 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from config import (
+    CATALOG_CACHE_CONTROL,
+    CATALOG_COMPRESSION_MIN_BYTES,
+    CATALOG_RESPONSE_CACHE_MAX_BYTES,
+    CATALOG_RESPONSE_CACHE_MAX_ENTRIES,
+)
+from metrics import span
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CacheKey = Tuple[Any, ...]
+Headers = Dict[str, str]
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6),
+}
+if brotli is not None:
+    ENCODERS["br"] = lambda body: bytes(brotli.compress(body, quality=5))
+
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+class CachedBody:
+    def __init__(self, etag: str, body: bytes, headers: Headers) -> None:
+        self.etag = etag
+        self.headers = headers
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        self.size = len(body)
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self.bodies.get(encoding)
+        if body is None:
+            with span("compress"):
+                body = ENCODERS[encoding](self.bodies["identity"])
+            self.bodies[encoding] = body
+            self.size += len(body)
+        return body
+
+
+class CatalogResponseCache:
+    def __init__(
+        self,
+        max_entries: int = CATALOG_RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = CATALOG_RESPONSE_CACHE_MAX_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[CacheKey, CachedBody]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[CachedBody]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedBody) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(entry.size for entry in self.entries.values())
+        while self.entries and (
+            len(self.entries) > self.max_entries or total > self.max_bytes
+        ):
+            _, entry = self.entries.popitem(last=False)
+            total -= entry.size
+
+    def resize(self) -> None:
+        with self.lock:
+            self._evict()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+catalog_response_cache = CatalogResponseCache()
+
+
+def make_etag(version: int, key: CacheKey) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    if encoding == "identity":
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    # Returns the tag from If-None-Match that names an encoding of etag, so a
+    # 304 repeats the tag of the representation the client holds.
+    if not if_none_match:
+        return None
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate.removeprefix("W/").strip('"')
+        unencoded = tag
+        for encoding in ENCODERS:
+            unencoded = unencoded.removesuffix(f"-{encoding}")
+        if unencoded == base:
+            return f'"{tag}"'
+    return None
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    if not accept_encoding:
+        return "identity"
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in ENCODERS and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+def _headers(etag: str, vary: str, encoding: str = "identity") -> Headers:
+    headers = {
+        "ETag": _encoded_etag(etag, encoding),
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        "Vary": vary,
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def _not_modified(
+    if_none_match: Optional[str], etag: str, vary: str
+) -> Optional[Response]:
+    matched = matching_etag(if_none_match, etag)
+    if matched is None:
+        return None
+    return Response(status_code=304, headers=_headers(matched, vary))
+
+
+def serialize(data: Sequence[Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def serialize_ndjson(rows: Sequence[Any]) -> bytes:
+    return "".join(
+        json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def catalog_response(
+    request: Request,
+    version: int,
+    key: CacheKey,
+    produce: Callable[[], Tuple[List[Any], Headers]],
+    vary: str = "Accept-Encoding",
+) -> Response:
+    etag = make_etag(version, key)
+    not_modified = _not_modified(request.headers.get("if-none-match"), etag, vary)
+    if not_modified is not None:
+        return not_modified
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    cache_key = (version,) + key
+    entry = catalog_response_cache.get(cache_key)
+    if entry is None:
+        with span("catalog"):
+            data, headers = produce()
+        with span("serialize"):
+            entry = CachedBody(etag, serialize(data), headers)
+        catalog_response_cache.put(cache_key, entry)
+    if len(entry.bodies["identity"]) < CATALOG_COMPRESSION_MIN_BYTES:
+        encoding = "identity"
+    body = entry.encoded(encoding)
+    if encoding != "identity":
+        catalog_response_cache.resize()
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**_headers(etag, vary, encoding), **entry.headers},
+    )
+
+
+def catalog_stream_response(
+    request: Request,
+    version: int,
+    key: CacheKey,
+    produce: Callable[[], Tuple[Iterator[bytes], Headers]],
+    media_type: str,
+    vary: str = "Accept-Encoding",
+) -> Response:
+    # Streamed bodies are neither cached nor compressed, so memory per request
+    # stays bounded by one chunk; conditional requests still get a 304.
+    etag = make_etag(version, key)
+    not_modified = _not_modified(request.headers.get("if-none-match"), etag, vary)
+    if not_modified is not None:
+        return not_modified
+    with span("catalog"):
+        chunks, headers = produce()
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={**_headers(etag, vary), **headers},
+    )
@@ -0,0 +1,148 @@
+import json
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from models.historical_price import HistoricalPrice
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.financial-api.columnar+json"
+BINARY_MEDIA_TYPE = "application/vnd.financial-api.columnar+binary"
+
+HISTORICAL_PRICE_FIELDS = list(HistoricalPrice.model_fields)
+
+HistoricalPriceColumns = Dict[str, Sequence[Any]]
+
+BINARY_MAGIC = b"FAPC"
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 8
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+BINARY_TYPECODES = {
+    field: "d" if info.annotation is float else "q"
+    for field, info in HistoricalPrice.model_fields.items()
+    if info.annotation in (float, int)
+}
+
+MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE: COLUMNAR_JSON_MEDIA_TYPE,
+    BINARY_MEDIA_TYPE: BINARY_MEDIA_TYPE,
+    "application/octet-stream": BINARY_MEDIA_TYPE,
+}
+
+
+def columns_from_bars(bars: Sequence[Dict[str, Any]]) -> HistoricalPriceColumns:
+    if not bars:
+        return {}
+    return {field: [bar[field] for bar in bars] for field in HISTORICAL_PRICE_FIELDS}
+
+
+def columns_from_rows(rows: Sequence[Sequence[Any]]) -> HistoricalPriceColumns:
+    if not rows:
+        return {}
+    return dict(zip(HISTORICAL_PRICE_FIELDS, zip(*rows)))
+
+
+def bars_from_columns(columns: HistoricalPriceColumns) -> List[Dict[str, Any]]:
+    if not columns:
+        return []
+    return [
+        dict(zip(HISTORICAL_PRICE_FIELDS, row))
+        for row in zip(*(columns[field] for field in HISTORICAL_PRICE_FIELDS))
+    ]
+
+
+def negotiate_media_type(
+    accept: Optional[str], media_types: Dict[str, str] = MEDIA_TYPES
+) -> str:
+    if not accept:
+        return JSON_MEDIA_TYPE
+    candidates: List[Tuple[float, int, str]] = []
+    for position, item in enumerate(accept.split(",")):
+        media_range, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_types.get(media_range.lower())
+        if media_type is not None and quality > 0:
+            candidates.append((-quality, position, media_type))
+    if not candidates:
+        return JSON_MEDIA_TYPE
+    return min(candidates)[2]
+
+
+def to_columnar_json(symbol: str, columns: HistoricalPriceColumns) -> bytes:
+    return json.dumps(
+        {
+            "symbol": symbol,
+            "count": len(columns["date"]) if columns else 0,
+            "columns": {
+                field: list(columns.get(field, ())) for field in HISTORICAL_PRICE_FIELDS
+            },
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+def _packed(typecode: str, values: Sequence[Any]) -> bytes:
+    packed = array(typecode, values if typecode == "d" else map(int, values))
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _padding(length: int) -> bytes:
+    return b"\0" * (-length % BINARY_ALIGNMENT)
+
+
+def to_binary(symbol: str, columns: HistoricalPriceColumns) -> bytes:
+    # magic | uint16 version | uint32 header length | JSON header | padding |
+    # 8-byte aligned little-endian column buffers, offsets relative to the
+    # first buffer. Dates are int64 days since 1970-01-01; labels are omitted.
+    count = len(columns["date"]) if columns else 0
+    buffers = [
+        (
+            "date",
+            "<i8",
+            _packed(
+                "q",
+                [
+                    date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+                    for value in columns.get("date", ())
+                ],
+            ),
+        )
+    ]
+    for field, typecode in BINARY_TYPECODES.items():
+        buffers.append(
+            (
+                field,
+                "<f8" if typecode == "d" else "<i8",
+                _packed(typecode, columns.get(field, ())),
+            )
+        )
+
+    fields = []
+    offset = 0
+    for field, dtype, data in buffers:
+        fields.append({"name": field, "dtype": dtype, "offset": offset})
+        offset += len(data) + len(_padding(len(data)))
+    header = json.dumps(
+        {"symbol": symbol, "count": count, "fields": fields}, separators=(",", ":")
+    ).encode()
+    prefix = BINARY_MAGIC + struct.pack("<HI", BINARY_VERSION, len(header)) + header
+
+    chunks = [prefix, _padding(len(prefix))]
+    for _, _, data in buffers:
+        chunks.append(data)
+        chunks.append(_padding(len(data)))
+    return b"".join(chunks)
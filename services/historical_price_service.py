@@ -1,44 +1,303 @@
-from typing import Dict, Union
+import asyncio
+import weakref
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import HTTPException, Query
-import requests
-from config import API_KEY, FINANCIAL_API_BASE_URL
-from models.historical_price import HistoricalPriceResponse
+from fastapi import HTTPException, Query, Response
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+from config import (
+    API_KEY,
+    FINANCIAL_API_BASE_URL,
+    HISTORICAL_PRICE_BATCH_MAX_SYMBOLS,
+    HISTORICAL_PRICE_STORE_ENABLED,
+    HISTORICAL_PRICE_UPSTREAM_CONCURRENCY,
+)
+from metrics import coalesced_requests_in_flight, span
+from models.historical_price import (
+    HistoricalPriceBatchItem,
+    HistoricalPriceBatchResponse,
+    HistoricalPriceResponse,
+)
+from services.historical_price_format import (
+    BINARY_MEDIA_TYPE,
+    HistoricalPriceColumns,
+    bars_from_columns,
+    columns_from_bars,
+    to_binary,
+    to_columnar_json,
+)
+from services.historical_price_store import (
+    load_bar_columns,
+    load_missing_ranges,
+    merge_bar_columns,
+    save_bars,
+)
+from services.single_flight import SingleFlight
+from services.upstream_client import UpstreamClient
 
 FINANCIAL_API_HISTORICAL_URL = f"{FINANCIAL_API_BASE_URL}/historical-price-full"
 
+upstream_flights: SingleFlight[Optional[List[Dict[str, Any]]]] = SingleFlight()
+request_flights: SingleFlight[HistoricalPriceColumns] = SingleFlight()
 
-def get_historical_price(
-    symbol: str = Query(
-        ..., title="Symbol", description="Symbol of the financial instrument."
-    ),
-    date_start: str = Query(
-        ..., title="Start Date", description="Start date for historical prices."
-    ),
-    date_end: str = Query(
-        ..., title="End Date", description="End date for historical prices."
-    ),
-) -> Union[HistoricalPriceResponse, Dict[None, None]]:
+coalesced_requests_in_flight.track(
+    lambda: {
+        ("historical_upstream",): upstream_flights.in_flight(),
+        ("historical_request",): request_flights.in_flight(),
+    }
+)
+
+_upstream_semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _upstream_semaphore() -> asyncio.Semaphore:
+    # One limit for every historical price fetch in the process: single
+    # requests, batches and analytics, each of which can fetch several gaps
+    # per symbol. Kept per event loop, since a semaphore is bound to one.
+    loop = asyncio.get_running_loop()
+    semaphore = _upstream_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(HISTORICAL_PRICE_UPSTREAM_CONCURRENCY)
+        _upstream_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+
+async def _request_historical_bars(
+    client: UpstreamClient, symbol: str, date_start: str, date_end: str
+) -> Optional[List[Dict[str, Any]]]:
     params = {
         "apikey": API_KEY,
         "from": date_start,
         "to": date_end,
     }
 
-    response = requests.get(
-        f"{FINANCIAL_API_HISTORICAL_URL}/{symbol}",
-        params=params,
-    )
+    async with _upstream_semaphore():
+        response = await client.get(
+            f"{FINANCIAL_API_HISTORICAL_URL}/{symbol}",
+            params=params,
+        )
 
     if response.status_code == 200:
         data = response.json()
-        if "historical" in data and data["historical"]:
-            return HistoricalPriceResponse(symbol=symbol, historical=data["historical"])
-        else:
-            return {}
+        if isinstance(data, dict) and "historical" in data:
+            historical: List[Dict[str, Any]] = data["historical"] or []
+            return historical
+        if data:
+            # Errors such as {"Error Message": ...} also come back with 200.
+            raise HTTPException(status_code=502, detail="Unexpected upstream response")
+        # An empty body has no bars, but is not recorded as a covered range.
+        return None
     elif response.status_code == 401:
         raise HTTPException(status_code=401, detail="Invalid API key")
     elif response.status_code == 404 or response.status_code == 403:
-        return {}
+        return None
     else:
         raise HTTPException(status_code=response.status_code, detail="Unexpected error")
+
+
+async def fetch_historical_bars(
+    client: UpstreamClient, symbol: str, date_start: str, date_end: str
+) -> Optional[List[Dict[str, Any]]]:
+    return await upstream_flights.do(
+        (symbol, date_start, date_end),
+        lambda: _request_historical_bars(client, symbol, date_start, date_end),
+    )
+
+
+async def _fetch_historical_columns(
+    client: UpstreamClient, symbol: str, date_start: str, date_end: str
+) -> HistoricalPriceColumns:
+    bars = await fetch_historical_bars(client, symbol, date_start, date_end)
+    return columns_from_bars(bars or [])
+
+
+async def _get_stored_historical_columns(
+    client: UpstreamClient, symbol: str, start: date, end: date
+) -> HistoricalPriceColumns:
+    try:
+        gaps = await run_in_threadpool(load_missing_ranges, symbol, start, end)
+        if gaps:
+            results = await asyncio.gather(
+                *(
+                    fetch_historical_bars(
+                        client, symbol, gap_start.isoformat(), gap_end.isoformat()
+                    )
+                    for gap_start, gap_end in gaps
+                )
+            )
+            fetched_ranges = []
+            fetched_bars = []
+            for gap, bars in zip(gaps, results):
+                if bars is not None:
+                    fetched_ranges.append(gap)
+                    fetched_bars.extend(bars)
+            if fetched_ranges and not await run_in_threadpool(
+                save_bars, symbol, fetched_ranges, fetched_bars
+            ):
+                stored = await run_in_threadpool(load_bar_columns, symbol, start, end)
+                return merge_bar_columns(
+                    stored, fetched_ranges, fetched_bars, start, end
+                )
+        return await run_in_threadpool(load_bar_columns, symbol, start, end)
+    except SQLAlchemyError:
+        # The store cannot be read, for example before `python migrate.py` has
+        # run on a lazy deployment, so the request goes straight upstream.
+        return await _fetch_historical_columns(
+            client, symbol, start.isoformat(), end.isoformat()
+        )
+
+
+async def get_historical_columns(
+    client: UpstreamClient, symbol: str, date_start: str, date_end: str
+) -> HistoricalPriceColumns:
+    if not HISTORICAL_PRICE_STORE_ENABLED:
+        return await _fetch_historical_columns(client, symbol, date_start, date_end)
+
+    start, end = _parse_date(date_start), _parse_date(date_end)
+    if start > end:
+        return {}
+    symbol = symbol.upper()
+    return await request_flights.do(
+        (symbol, start, end),
+        lambda: _get_stored_historical_columns(client, symbol, start, end),
+    )
+
+
+async def get_historical_bars(
+    client: UpstreamClient, symbol: str, date_start: str, date_end: str
+) -> List[Dict[str, Any]]:
+    columns = await get_historical_columns(client, symbol, date_start, date_end)
+    return bars_from_columns(columns)
+
+
+async def get_historical_price(
+    client: UpstreamClient,
+    symbol: str = Query(
+        ..., title="Symbol", description="Symbol of the financial instrument."
+    ),
+    date_start: str = Query(
+        ..., title="Start Date", description="Start date for historical prices."
+    ),
+    date_end: str = Query(
+        ..., title="End Date", description="End date for historical prices."
+    ),
+) -> Union[HistoricalPriceResponse, Dict[None, None]]:
+    historical = await get_historical_bars(client, symbol, date_start, date_end)
+    if historical:
+        with span("validate"):
+            return HistoricalPriceResponse.model_validate(
+                {"symbol": symbol, "historical": historical}
+            )
+    else:
+        return {}
+
+
+async def get_historical_price_encoded(
+    client: UpstreamClient,
+    symbol: str,
+    date_start: str,
+    date_end: str,
+    media_type: str,
+) -> Response:
+    columns = await get_historical_columns(client, symbol, date_start, date_end)
+    with span("serialize"):
+        if media_type == BINARY_MEDIA_TYPE:
+            content = to_binary(symbol, columns)
+        else:
+            content = to_columnar_json(symbol, columns)
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def validate_batch_request(
+    symbols: List[str], date_start: str, date_end: str
+) -> List[str]:
+    unique_symbols = list(dict.fromkeys(s.strip() for s in symbols if s.strip()))
+    if not unique_symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(unique_symbols) > HISTORICAL_PRICE_BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {HISTORICAL_PRICE_BATCH_MAX_SYMBOLS} symbols per batch",
+        )
+    if HISTORICAL_PRICE_STORE_ENABLED:
+        _parse_date(date_start)
+        _parse_date(date_end)
+    return unique_symbols
+
+
+async def _get_batch_columns(
+    client: UpstreamClient,
+    symbol: str,
+    date_start: str,
+    date_end: str,
+) -> Union[HistoricalPriceColumns, HTTPException]:
+    try:
+        return await get_historical_columns(client, symbol, date_start, date_end)
+    except HTTPException as error:
+        return error
+    except Exception:
+        return HTTPException(status_code=500, detail="Unexpected error")
+
+
+async def get_historical_columns_batch(
+    client: UpstreamClient, symbols: List[str], date_start: str, date_end: str
+) -> List[Union[HistoricalPriceColumns, HTTPException]]:
+    return list(
+        await asyncio.gather(
+            *(
+                _get_batch_columns(client, symbol, date_start, date_end)
+                for symbol in symbols
+            )
+        )
+    )
+
+
+def _batch_item(
+    symbol: str, result: Union[HistoricalPriceColumns, HTTPException]
+) -> HistoricalPriceBatchItem:
+    if isinstance(result, HTTPException):
+        return HistoricalPriceBatchItem(
+            symbol=symbol, status_code=result.status_code, error=result.detail
+        )
+    if not result:
+        return HistoricalPriceBatchItem(
+            symbol=symbol, status_code=404, error="No data found for the symbol"
+        )
+    return HistoricalPriceBatchItem.model_validate(
+        {
+            "symbol": symbol,
+            "status_code": 200,
+            "data": {"symbol": symbol, "historical": bars_from_columns(result)},
+        }
+    )
+
+
+async def get_historical_price_batch(
+    client: UpstreamClient,
+    symbols: List[str],
+    date_start: str,
+    date_end: str,
+) -> HistoricalPriceBatchResponse:
+    unique_symbols = validate_batch_request(symbols, date_start, date_end)
+    results = await get_historical_columns_batch(
+        client, unique_symbols, date_start, date_end
+    )
+    with span("validate"):
+        return HistoricalPriceBatchResponse(
+            date_start=date_start,
+            date_end=date_end,
+            results=[
+                _batch_item(symbol, result)
+                for symbol, result in zip(unique_symbols, results)
+            ],
+        )
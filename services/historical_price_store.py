@@ -0,0 +1,234 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from config import HISTORICAL_PRICE_FRESHNESS_SECONDS
+from database import get_engine
+from models.historical_price_bar import HistoricalPriceBar, HistoricalPriceRange
+from services.historical_price_format import (
+    HISTORICAL_PRICE_FIELDS,
+    HistoricalPriceColumns,
+    bars_from_columns,
+    columns_from_bars,
+    columns_from_rows,
+)
+
+DateRange = Tuple[date, date]
+
+MAX_GAPS_PER_REQUEST = 4
+
+ONE_DAY = timedelta(days=1)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _is_fresh(fetched_at: datetime, now: datetime) -> bool:
+    return (now - fetched_at).total_seconds() < HISTORICAL_PRICE_FRESHNESS_SECONDS
+
+
+def _merge_ranges(ranges: Sequence[DateRange]) -> List[DateRange]:
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def covered_ranges(
+    coverage: Sequence[HistoricalPriceRange], now: datetime
+) -> List[DateRange]:
+    # Days before the fetch day are final; the fetch day itself (the current
+    # trading day at the time) and later are only trusted while still fresh.
+    ranges: List[DateRange] = []
+    for item in coverage:
+        if _is_fresh(item.fetched_at, now):
+            ranges.append((item.date_start, item.date_end))
+            continue
+        final_end = min(item.date_end, item.fetched_at.date() - ONE_DAY)
+        if item.date_start <= final_end:
+            ranges.append((item.date_start, final_end))
+    return _merge_ranges(ranges)
+
+
+def missing_ranges(
+    coverage: Sequence[HistoricalPriceRange], start: date, end: date, now: datetime
+) -> List[DateRange]:
+    gaps: List[DateRange] = []
+    cursor = start
+    for covered_start, covered_end in covered_ranges(coverage, now):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - ONE_DAY))
+        cursor = covered_end + ONE_DAY
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    if len(gaps) > MAX_GAPS_PER_REQUEST:
+        gaps = [(gaps[0][0], gaps[-1][1])]
+    return gaps
+
+
+def load_missing_ranges(symbol: str, start: date, end: date) -> List[DateRange]:
+    with Session(get_engine()) as session:
+        coverage = (
+            session.execute(
+                select(HistoricalPriceRange).where(
+                    HistoricalPriceRange.symbol == symbol  # type: ignore[arg-type]
+                )
+            )
+            .scalars()
+            .all()
+        )
+        return missing_ranges(coverage, start, end, utc_now())
+
+
+def _compact_coverage(
+    symbol: str, coverage: Sequence[HistoricalPriceRange], now: datetime
+) -> List[HistoricalPriceRange]:
+    final: List[DateRange] = []
+    fresh: List[HistoricalPriceRange] = []
+    final_fetched_at = datetime.min
+    for item in coverage:
+        fetch_day = item.fetched_at.date()
+        final_end = min(item.date_end, fetch_day - ONE_DAY)
+        if item.date_start <= final_end:
+            final.append((item.date_start, final_end))
+            final_fetched_at = max(final_fetched_at, item.fetched_at)
+        if item.date_end >= fetch_day and _is_fresh(item.fetched_at, now):
+            fresh.append(
+                HistoricalPriceRange(
+                    symbol=symbol,
+                    date_start=max(item.date_start, fetch_day),
+                    date_end=item.date_end,
+                    fetched_at=item.fetched_at,
+                )
+            )
+    compacted = [
+        HistoricalPriceRange(
+            symbol=symbol,
+            date_start=range_start,
+            date_end=range_end,
+            fetched_at=final_fetched_at,
+        )
+        for range_start, range_end in _merge_ranges(final)
+    ]
+    return compacted + fresh
+
+
+def _upsert_bars(session: Session, symbol: str, bars: Sequence[Dict[str, Any]]) -> None:
+    # Concurrent requests for overlapping ranges of one symbol each fetch and
+    # write the shared days, so a bar that already exists is overwritten.
+    # PostgreSQL rejects a statement that updates one row twice, so repeated
+    # days within the fetched bars keep the last one.
+    dialect = session.get_bind().dialect.name
+    upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = upsert(HistoricalPriceBar)
+    statement = statement.on_conflict_do_update(
+        index_elements=["symbol", "date"],
+        set_={
+            field: statement.excluded[field]
+            for field in HISTORICAL_PRICE_FIELDS
+            if field != "date"
+        },
+    )
+    rows = {
+        bar["date"]: {
+            "symbol": symbol,
+            **{key: bar[key] for key in HISTORICAL_PRICE_FIELDS},
+        }
+        for bar in bars
+    }
+    session.execute(statement, list(rows.values()))
+
+
+def save_bars(
+    symbol: str, ranges: Sequence[DateRange], bars: Sequence[Dict[str, Any]]
+) -> bool:
+    now = utc_now()
+    try:
+        with Session(get_engine()) as session:
+            for range_start, range_end in ranges:
+                session.execute(
+                    delete(HistoricalPriceBar).where(
+                        HistoricalPriceBar.symbol == symbol,  # type: ignore[arg-type]
+                        HistoricalPriceBar.date >= range_start.isoformat(),  # type: ignore[arg-type]
+                        HistoricalPriceBar.date <= range_end.isoformat(),  # type: ignore[arg-type]
+                    )
+                )
+            if bars:
+                _upsert_bars(session, symbol, bars)
+
+            coverage = list(
+                session.execute(
+                    select(HistoricalPriceRange).where(
+                        HistoricalPriceRange.symbol == symbol  # type: ignore[arg-type]
+                    )
+                ).scalars()
+            )
+            coverage.extend(
+                HistoricalPriceRange(
+                    symbol=symbol,
+                    date_start=range_start,
+                    date_end=range_end,
+                    fetched_at=now,
+                )
+                for range_start, range_end in ranges
+            )
+            session.execute(
+                delete(HistoricalPriceRange).where(
+                    HistoricalPriceRange.symbol == symbol  # type: ignore[arg-type]
+                )
+            )
+            session.add_all(_compact_coverage(symbol, coverage, now))
+            session.commit()
+    except SQLAlchemyError:
+        return False
+    return True
+
+
+def load_bar_columns(symbol: str, start: date, end: date) -> HistoricalPriceColumns:
+    columns = [getattr(HistoricalPriceBar, field) for field in HISTORICAL_PRICE_FIELDS]
+    with Session(get_engine()) as session:
+        rows = session.execute(
+            select(*columns)
+            .where(
+                HistoricalPriceBar.symbol == symbol,  # type: ignore[arg-type]
+                HistoricalPriceBar.date >= start.isoformat(),  # type: ignore[arg-type]
+                HistoricalPriceBar.date <= end.isoformat(),  # type: ignore[arg-type]
+            )
+            .order_by(HistoricalPriceBar.date.desc())  # type: ignore[attr-defined]
+        )
+        return columns_from_rows(rows.all())
+
+
+def merge_bar_columns(
+    stored: HistoricalPriceColumns,
+    ranges: Sequence[DateRange],
+    bars: Sequence[Dict[str, Any]],
+    start: date,
+    end: date,
+) -> HistoricalPriceColumns:
+    # Used when fetched bars could not be saved: they replace the stored bars
+    # of the ranges they were fetched for, as save_bars would have done.
+    bounds = [
+        (range_start.isoformat(), range_end.isoformat())
+        for range_start, range_end in ranges
+    ]
+    merged = {
+        bar["date"]: bar
+        for bar in bars_from_columns(stored)
+        if not any(low <= bar["date"] <= high for low, high in bounds)
+    }
+    first, last = start.isoformat(), end.isoformat()
+    merged.update((bar["date"], bar) for bar in bars if first <= bar["date"] <= last)
+    return columns_from_bars([merged[day] for day in sorted(merged, reverse=True)])
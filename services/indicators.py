@@ -0,0 +1,109 @@
+from typing import Optional, Sequence
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import NDArray
+
+FloatArray = NDArray[np.float64]
+
+MAX_EXPONENT = 150
+
+
+def _nan_array(length: int) -> FloatArray:
+    return np.full(length, np.nan)
+
+
+def sma(values: FloatArray, window: int) -> FloatArray:
+    result = _nan_array(len(values))
+    if window < 1 or len(values) < window:
+        return result
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    result[window - 1 :] = (sums[window:] - sums[:-window]) / window
+    return result
+
+
+def ewm(
+    values: FloatArray, alpha: float, initial: Optional[float] = None
+) -> FloatArray:
+    # y[t] = (1 - alpha) * y[t-1] + alpha * x[t], with y[-1] = initial (x[0] by
+    # default). Within a block the recurrence has the closed form
+    # y[k] = d^(k+1) * y[-1] + alpha * d^k * cumsum(x[j] * d^-j), d = 1 - alpha;
+    # blocks are sized so d^-j stays well inside float64 range.
+    result = np.empty(len(values))
+    if len(values) == 0:
+        return result
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        result[:] = values
+        return result
+    previous = values[0] if initial is None else initial
+    block = len(values)
+    if decay < 1.0:
+        block = max(1, min(block, int(MAX_EXPONENT / -np.log10(decay))))
+    exponents = np.arange(block)
+    powers = decay**exponents
+    inverse_powers = decay**-exponents
+    for start in range(0, len(values), block):
+        chunk = values[start : start + block]
+        size = len(chunk)
+        weighted = np.cumsum(chunk * inverse_powers[:size])
+        result[start : start + size] = (
+            powers[:size] * decay * previous + alpha * powers[:size] * weighted
+        )
+        previous = result[start + size - 1]
+    return result
+
+
+def ema(values: FloatArray, window: int) -> FloatArray:
+    return ewm(values, 2.0 / (window + 1))
+
+
+def log_returns(prices: FloatArray) -> FloatArray:
+    result = _nan_array(len(prices))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(prices > 0, prices, np.nan))
+    result[1:] = np.diff(logs)
+    return result
+
+
+def rolling_volatility(
+    prices: FloatArray, window: int, periods_per_year: int = 252
+) -> FloatArray:
+    result = _nan_array(len(prices))
+    returns = log_returns(prices)[1:]
+    if window < 2 or len(returns) < window:
+        return result
+    windows = sliding_window_view(returns, window)
+    result[window:] = windows.std(axis=1, ddof=1) * np.sqrt(periods_per_year)
+    return result
+
+
+def rsi(prices: FloatArray, window: int) -> FloatArray:
+    result = _nan_array(len(prices))
+    if window < 1 or len(prices) <= window:
+        return result
+    deltas = np.diff(prices)
+    gains = np.clip(deltas, 0.0, None)
+    losses = np.clip(-deltas, 0.0, None)
+    alpha = 1.0 / window
+    average_gain = ewm(gains[window:], alpha, gains[:window].mean())
+    average_loss = ewm(losses[window:], alpha, losses[:window].mean())
+    average_gain = np.concatenate(([gains[:window].mean()], average_gain))
+    average_loss = np.concatenate(([losses[:window].mean()], average_loss))
+    total = average_gain + average_loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result[window:] = np.where(total > 0, 100.0 * average_gain / total, 50.0)
+    return result
+
+
+def drawdown(prices: FloatArray) -> FloatArray:
+    if len(prices) == 0:
+        return np.empty(0)
+    result: FloatArray = prices / np.maximum.accumulate(prices) - 1.0
+    return result
+
+
+def correlation_matrix(returns: Sequence[FloatArray]) -> FloatArray:
+    matrix = np.vstack(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation: FloatArray = np.atleast_2d(np.corrcoef(matrix))
+    return correlation
@@ -0,0 +1,254 @@
+import bisect
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from array import array
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Engine, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from config import STOCK_CATALOG_CHECK_SECONDS
+from database import get_engine
+from models.catalog_version import CatalogVersion
+from models.country_data import CountryData
+from models.stock_data import StockData
+
+STOCK_FIELDS = [
+    "id",
+    "symbol",
+    "name",
+    "currency",
+    "exchange",
+    "mic_code",
+    "country",
+    "type",
+]
+
+INTERNED_FIELDS = ("currency", "exchange", "mic_code", "country", "type")
+
+GRAM_SIZE = 3
+
+CATALOG_NAME = "stockdata"
+
+Postings = Dict[str, "array[int]"]
+
+
+def _grams(value: str, sizes: Iterable[int]) -> set[str]:
+    return {
+        value[start : start + size]
+        for size in sizes
+        for start in range(len(value) - size + 1)
+    }
+
+
+def _build_postings(values: Sequence[str], sizes: Iterable[int]) -> Postings:
+    sizes = tuple(sizes)
+    postings: Dict[str, List[int]] = {}
+    for index, value in enumerate(values):
+        for gram in _grams(value, sizes):
+            postings.setdefault(gram, []).append(index)
+    return {gram: array("I", indices) for gram, indices in postings.items()}
+
+
+def _build_exact_index(values: Sequence[str]) -> Postings:
+    index: Dict[str, List[int]] = {}
+    for position, value in enumerate(values):
+        index.setdefault(value, []).append(position)
+    return {value: array("I", positions) for value, positions in index.items()}
+
+
+class StockCatalog:
+    def __init__(self, rows: Sequence[Sequence[Any]], version: int = 0) -> None:
+        self.version = version
+        self.checked_at = time.monotonic()
+        columns = list(zip(*rows)) if rows else [()] * len(STOCK_FIELDS)
+        self.size = len(rows)
+        self.ids = array("q", columns[0])
+        self.columns: Dict[str, List[str]] = {}
+        for field, values in zip(STOCK_FIELDS[1:], columns[1:]):
+            if field in INTERNED_FIELDS:
+                self.columns[field] = [sys.intern(value or "") for value in values]
+            else:
+                self.columns[field] = [value or "" for value in values]
+
+        self.lowered = {
+            field: [value.lower() for value in self.columns[field]]
+            for field in ("symbol", "name")
+        }
+        self.symbol_grams = _build_postings(
+            self.lowered["symbol"], range(1, GRAM_SIZE + 1)
+        )
+        self.name_grams = _build_postings(self.lowered["name"], (2, GRAM_SIZE))
+        self.exact_indexes = {
+            field: _build_exact_index(self.columns[field])
+            for field in ("country", "exchange")
+        }
+        self.country_data = self._build_country_data()
+
+    def _build_country_data(self) -> List[CountryData]:
+        exchanges: Dict[str, set[str]] = {}
+        for country, exchange in zip(self.columns["country"], self.columns["exchange"]):
+            if country and exchange:
+                exchanges.setdefault(country, set()).add(exchange)
+        return [
+            CountryData(country=country, exchange=", ".join(sorted(exchanges[country])))
+            for country in sorted(exchanges)
+        ]
+
+    def _substring_plan(
+        self, field: str, query: str
+    ) -> Tuple[int, Callable[[], Sequence[int]], Callable[[int], bool]]:
+        lowered = self.lowered[field]
+        grams = self.symbol_grams if field == "symbol" else self.name_grams
+
+        def matches(index: int) -> bool:
+            return query in lowered[index]
+
+        if not query:
+            return self.size, lambda: range(self.size), lambda index: True
+        if len(query) <= GRAM_SIZE:
+            if field == "name" and len(query) == 1:
+                return (
+                    self.size,
+                    lambda: [i for i, value in enumerate(lowered) if query in value],
+                    matches,
+                )
+            posting = grams.get(query, array("I"))
+            return len(posting), lambda: posting, matches
+
+        posting = min(
+            (grams.get(gram, array("I")) for gram in _grams(query, (GRAM_SIZE,))),
+            key=len,
+        )
+
+        def candidates() -> Sequence[int]:
+            return [index for index in posting if query in lowered[index]]
+
+        return len(posting), candidates, matches
+
+    def _exact_plan(
+        self, field: str, query: str
+    ) -> Tuple[int, Callable[[], Sequence[int]], Callable[[int], bool]]:
+        index = self.exact_indexes[field]
+        matching = [value for value in index if query in value.lower()]
+        matching_set = set(matching)
+        values = self.columns[field]
+
+        def candidates() -> Sequence[int]:
+            if len(matching) == 1:
+                return index[matching[0]]
+            return sorted(chain.from_iterable(index[value] for value in matching))
+
+        def matches(position: int) -> bool:
+            return values[position] in matching_set
+
+        return sum(len(index[value]) for value in matching), candidates, matches
+
+    def search(
+        self,
+        country: Optional[str] = None,
+        exchange: Optional[str] = None,
+        symbol: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> List[int]:
+        plans = []
+        if country is not None:
+            plans.append(self._exact_plan("country", country.lower()))
+        if exchange is not None:
+            plans.append(self._exact_plan("exchange", exchange.lower()))
+        if symbol is not None:
+            plans.append(self._substring_plan("symbol", symbol.lower()))
+        if name is not None:
+            plans.append(self._substring_plan("name", name.lower()))
+        if not plans:
+            return list(range(self.size))
+
+        plans.sort(key=lambda plan: plan[0])
+        _, candidates, _ = plans[0]
+        found = candidates()
+        for _, _, matches in plans[1:]:
+            found = [index for index in found if matches(index)]
+        return list(found)
+
+    def page(
+        self, indices: Sequence[int], cursor: Optional[int], limit: Optional[int]
+    ) -> Tuple[Sequence[int], Optional[int]]:
+        # Rows are ordered by id, so the rows after a cursor id start at the
+        # first position with a larger id, in the catalog and in `indices`.
+        start = 0
+        if cursor is not None:
+            start = bisect.bisect_left(indices, bisect.bisect_right(self.ids, cursor))
+        if limit is None:
+            return indices[start:], None
+        end = start + limit
+        page = indices[start:end]
+        return page, self.ids[page[-1]] if end < len(indices) else None
+
+    def row(self, index: int) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"id": self.ids[index]}
+        for field, values in self.columns.items():
+            data[field] = values[index]
+        return data
+
+    def rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.row(index) for index in indices]
+
+
+_catalog: Optional[StockCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def read_catalog_version(session: Session) -> int:
+    version = session.get(CatalogVersion, CATALOG_NAME)
+    return version.version if version else 0
+
+
+def bump_catalog_version(session: Session) -> int:
+    version = session.get(CatalogVersion, CATALOG_NAME)
+    if version is None:
+        version = CatalogVersion(name=CATALOG_NAME, version=0)
+        session.add(version)
+    version.version += 1
+    version.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    return version.version
+
+
+def load_stock_catalog(engine: Optional[Engine] = None) -> StockCatalog:
+    columns = [getattr(StockData, field) for field in STOCK_FIELDS]
+    with Session(engine or get_engine()) as session:
+        version = read_catalog_version(session)
+        rows = session.execute(select(*columns).order_by(columns[0])).all()
+    return StockCatalog(rows, version)
+
+
+def refresh_stock_catalog() -> StockCatalog:
+    global _catalog
+    catalog = load_stock_catalog()
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
+
+
+def _is_current(catalog: StockCatalog) -> bool:
+    if time.monotonic() - catalog.checked_at < STOCK_CATALOG_CHECK_SECONDS:
+        return True
+    catalog.checked_at = time.monotonic()
+    try:
+        with Session(get_engine()) as session:
+            version = read_catalog_version(session)
+    except SQLAlchemyError:
+        return True
+    return version == catalog.version
+
+
+def get_stock_catalog() -> StockCatalog:
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and _is_current(catalog):
+        return catalog
+    with _catalog_lock:
+        if _catalog is None or _catalog is catalog:
+            _catalog = load_stock_catalog()
+        return _catalog
@@ -1,58 +1,109 @@
-from typing import List, Optional, Union
-from fastapi import HTTPException, Query, Response
-from fastapi.responses import HTMLResponse
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+from fastapi import HTTPException, Query, Request, Response
 import requests
-from sqlalchemy import (
-    ColumnElement,
-    create_engine,
-    select,
-    text,
-)
-from sqlmodel import SQLModel, Session
+from sqlalchemy import ColumnElement
+from sqlmodel import Session
 from models.country_data import CountryData
 from models.stock_data import StockData
-from config import TWELVE_DATA_BASE_URL, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST
+from models.stock_ingest_report import StockIngestReport
+from services.catalog_response import (
+    Headers,
+    catalog_response,
+    catalog_stream_response,
+    serialize_ndjson,
+)
+from services.historical_price_format import JSON_MEDIA_TYPE, negotiate_media_type
+from services.stock_catalog import (
+    StockCatalog,
+    get_stock_catalog,
+    refresh_stock_catalog,
+)
+from services.stock_ingest import ingest_stock_items, iter_data_items
+from config import (
+    STOCK_INGEST_CHUNK_SIZE,
+    STOCK_STREAM_BATCH_SIZE,
+    TWELVE_DATA_BASE_URL,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_TIMEOUT,
+)
+from metrics import span, upstream_responses
 
 GET_STOCKS_URL = f"{TWELVE_DATA_BASE_URL}/stocks"
+GET_STOCKS_HOST = urlparse(GET_STOCKS_URL).hostname or ""
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+STOCK_MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE: NDJSON_MEDIA_TYPE,
+    "application/ndjson": NDJSON_MEDIA_TYPE,
+    "application/jsonlines": NDJSON_MEDIA_TYPE,
+}
+
+
+def set_stock_data(session: Session) -> StockIngestReport:
+    with span("upstream"):
+        response = requests.get(
+            GET_STOCKS_URL,
+            stream=True,
+            timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_TIMEOUT),
+        )
+    upstream_responses.inc(GET_STOCKS_HOST, str(response.status_code))
+    with response:
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code, detail="Unexpected error"
+            )
+        items = iter_data_items(response.iter_content(STOCK_INGEST_CHUNK_SIZE))
+        with span("ingest"):
+            report = ingest_stock_items(session, items)
+
+    if report.inserted or report.updated or report.deleted:
+        with span("catalog_refresh"):
+            refresh_stock_catalog()
+    return report
+
 
-DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}"
-
-
-def set_stock_data() -> Response:
-
-    response = requests.get(GET_STOCKS_URL)
-    engine = create_engine(DATABASE_URL, echo=True)
-    SQLModel.metadata.create_all(engine)
-
-    if response.status_code == 200:
-        data = response.json()["data"]
-
-        with Session(engine) as session:
-            existing_record = session.execute(select(StockData)).first()
-            if not existing_record:
-                for item in data:
-                    stock_data_instance = StockData(
-                        symbol=item["symbol"],
-                        name=item["name"],
-                        currency=item["currency"],
-                        exchange=item["exchange"],
-                        mic_code=item["mic_code"],
-                        country=item["country"],
-                        type=item["type"],
-                    )
-                    session.add(stock_data_instance)
-                session.commit()
-                return HTMLResponse(
-                    content="Data added successfully",
-                    status_code=200,
-                )
-            else:
-                return HTMLResponse(
-                    content="OK, Data already exists",
-                    status_code=200,
-                )
+def query_stock_list(
+    session: Session,
+    country: Optional[str] = Query(
+        None, title="Country", description="Country of the financial instrument."
+    ),
+    exchange: Optional[str] = Query(
+        None, title="Exchange", description="Exchange for financial instrument."
+    ),
+    symbol: Optional[str] = Query(
+        None, title="Symbol", description="Symbol for financial instrument."
+    ),
+    name: Optional[str] = Query(
+        None, title="Name", description="Name for financial instrument."
+    ),
+) -> List[StockData]:
+    data_query = session.query(StockData)
+
+    filters: Union[ColumnElement[bool], List[bool]] = []
+
+    if country is not None:
+        filters.append(StockData.country.ilike(f"%{country}%"))
+    if exchange is not None:
+        filters.append(StockData.exchange.ilike(f"%{exchange}%"))
+    if symbol is not None:
+        filters.append(StockData.symbol.ilike(f"%{symbol}%"))
+    if name is not None:
+        filters.append(StockData.name.ilike(f"%{name}%"))
+
+    if filters:
+        data_query = data_query.filter(*filters)
+
+    data = data_query.all()
+
+    if data:
+        return data
     else:
-        raise HTTPException(status_code=response.status_code, detail="Unexpected error")
+        raise HTTPException(status_code=404, detail="No data found for the query")
 
 
 def get_stock_list(
@@ -68,66 +119,123 @@ def get_stock_list(
     name: Optional[str] = Query(
         None, title="Name", description="Name for financial instrument."
     ),
-) -> List[StockData]:
-    engine = create_engine(DATABASE_URL, echo=True)
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-
-        data_query = session.query(StockData)
-
-        filters: Union[ColumnElement[bool], List[bool]] = []
-
-        if country is not None:
-            filters.append(StockData.country.ilike(f"%{country}%"))
-        if exchange is not None:
-            filters.append(StockData.exchange.ilike(f"%{exchange}%"))
-        if symbol is not None:
-            filters.append(StockData.symbol.ilike(f"%{symbol}%"))
-        if name is not None:
-            filters.append(StockData.name.ilike(f"%{name}%"))
-
-        if filters:
-            data_query = data_query.filter(*filters)
-
-        data = data_query.all()
-
-        if data:
-            return data
-        else:
-            raise HTTPException(status_code=404, detail="No data found for the query")
-
-
-def get_country_data() -> List[CountryData]:
-    engine = create_engine(DATABASE_URL, echo=True)
-    SQLModel.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        data_query = text(
-            """
-            SELECT country, STRING_AGG(DISTINCT exchange, ', ')
-            FROM (
-                SELECT DISTINCT country, exchange
-                FROM stockdata
-            ) AS subquery
-            GROUP BY country;
-            """
+    catalog: Optional[StockCatalog] = None,
+) -> List[Dict[str, Any]]:
+    catalog = catalog or get_stock_catalog()
+    indices, _ = get_stock_page(catalog, country, exchange, symbol, name, None, None)
+    return catalog.rows(indices)
+
+
+def get_country_data(catalog: Optional[StockCatalog] = None) -> List[CountryData]:
+    data = (catalog or get_stock_catalog()).country_data
+
+    if data:
+        return data
+    else:
+        raise HTTPException(
+            status_code=500, detail="Error occurred while fetching country data"
         )
 
-        results = session.execute(data_query)
-        data = []
-        for row in results:
-            country = row[0]
-            exchange = row[1]
-            if country and exchange:
-                country_data = CountryData(
-                    country=country,
-                    exchange=exchange,
-                )
-                data.append(country_data)
-
-        if data:
-            return data
-        else:
-            raise HTTPException(
-                status_code=500, detail="Error occurred while fetching country data"
-            )
+
+def get_stock_page(
+    catalog: StockCatalog,
+    country: Optional[str],
+    exchange: Optional[str],
+    symbol: Optional[str],
+    name: Optional[str],
+    cursor: Optional[int],
+    limit: Optional[int],
+) -> Tuple[Sequence[int], Optional[int]]:
+    indices = catalog.search(country, exchange, symbol, name)
+    if not indices:
+        raise HTTPException(status_code=404, detail="No data found for the query")
+    return catalog.page(indices, cursor, limit)
+
+
+def _next_page_headers(next_cursor: Optional[int]) -> Headers:
+    if next_cursor is None:
+        return {}
+    return {"X-Next-Cursor": str(next_cursor)}
+
+
+def _with_next_page_link(request: Request, response: Response) -> Response:
+    # Cached bodies are shared by requests that differ in host, case and
+    # unrelated query parameters, so only the cursor is cached and the link
+    # is built from the current request.
+    next_cursor = response.headers.get("X-Next-Cursor")
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+def _iter_ndjson(catalog: StockCatalog, indices: Sequence[int]) -> Iterator[bytes]:
+    for start in range(0, len(indices), STOCK_STREAM_BATCH_SIZE):
+        yield serialize_ndjson(
+            catalog.rows(indices[start : start + STOCK_STREAM_BATCH_SIZE])
+        )
+
+
+def get_stock_list_response(
+    request: Request,
+    country: Optional[str],
+    exchange: Optional[str],
+    symbol: Optional[str],
+    name: Optional[str],
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    accept: Optional[str] = None,
+) -> Response:
+    catalog = get_stock_catalog()
+    media_type = negotiate_media_type(accept, STOCK_MEDIA_TYPES)
+    filters = [country, exchange, symbol, name]
+    key = (
+        ("stock-search",)
+        + tuple(value.lower() if value is not None else None for value in filters)
+        + (cursor, limit, media_type)
+    )
+
+    def page() -> Tuple[Sequence[int], Headers]:
+        indices, next_cursor = get_stock_page(
+            catalog, country, exchange, symbol, name, cursor, limit
+        )
+        return indices, _next_page_headers(next_cursor)
+
+    if media_type == NDJSON_MEDIA_TYPE:
+
+        def stream() -> Tuple[Iterator[bytes], Headers]:
+            indices, headers = page()
+            return _iter_ndjson(catalog, indices), headers
+
+        return _with_next_page_link(
+            request,
+            catalog_stream_response(
+                request,
+                catalog.version,
+                key,
+                stream,
+                NDJSON_MEDIA_TYPE,
+                vary="Accept, Accept-Encoding",
+            ),
+        )
+
+    def rows() -> Tuple[List[Dict[str, Any]], Headers]:
+        indices, headers = page()
+        return catalog.rows(indices), headers
+
+    return _with_next_page_link(
+        request,
+        catalog_response(
+            request, catalog.version, key, rows, vary="Accept, Accept-Encoding"
+        ),
+    )
+
+
+def get_country_data_response(request: Request) -> Response:
+    catalog = get_stock_catalog()
+    return catalog_response(
+        request,
+        catalog.version,
+        ("country-data",),
+        lambda: ([item.model_dump() for item in get_country_data(catalog)], {}),
+    )
@@ -0,0 +1,131 @@
+import codecs
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlmodel import Session
+from config import STOCK_INGEST_BATCH_SIZE
+from models.stock_data import StockData
+from models.stock_ingest_report import StockIngestReport
+from services.stock_catalog import bump_catalog_version
+
+STOCK_KEY_FIELDS = ("symbol", "mic_code")
+STOCK_VALUE_FIELDS = ("name", "currency", "exchange", "country", "type")
+STOCK_INPUT_FIELDS = STOCK_KEY_FIELDS + STOCK_VALUE_FIELDS
+
+DATA_ARRAY_START = re.compile(r'"data"\s*:\s*\[')
+ITEM_SEPARATORS = " \t\r\n,"
+
+StockKey = Tuple[str, str]
+StockValues = Tuple[str, ...]
+
+
+def iter_data_items(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    in_array = False
+    for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        if not in_array:
+            match = DATA_ARRAY_START.search(buffer)
+            if match is None:
+                continue
+            in_array = True
+            position = match.end()
+        while True:
+            while position < len(buffer) and buffer[position] in ITEM_SEPARATORS:
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item
+    raise HTTPException(status_code=502, detail="Unexpected stock data payload")
+
+
+def _parse_stock_items(
+    items: Iterable[Dict[str, Any]],
+) -> Tuple[int, Dict[StockKey, StockValues]]:
+    received = 0
+    incoming: Dict[StockKey, StockValues] = {}
+    for item in items:
+        received += 1
+        key = (item["symbol"], item["mic_code"])
+        incoming[key] = tuple(item[field] for field in STOCK_VALUE_FIELDS)
+    return received, incoming
+
+
+def _batches(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def ingest_stock_items(
+    session: Session,
+    items: Iterable[Dict[str, Any]],
+    batch_size: int = STOCK_INGEST_BATCH_SIZE,
+) -> StockIngestReport:
+    started = time.perf_counter()
+    received, incoming = _parse_stock_items(items)
+    if not incoming:
+        raise HTTPException(status_code=502, detail="No stock data received")
+    fetched = time.perf_counter()
+
+    table = StockData.__table__  # type: ignore[attr-defined]
+    existing: Dict[StockKey, Tuple[int, StockValues]] = {}
+    deletes: List[int] = []
+    columns = [table.c.id] + [table.c[field] for field in STOCK_INPUT_FIELDS]
+    for record in session.execute(select(*columns).order_by(table.c.id)):
+        key = (record[1], record[2])
+        if key in existing or key not in incoming:
+            deletes.append(record[0])
+        else:
+            existing[key] = (record[0], tuple(record[3:]))
+
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    unchanged = 0
+    for key, values in incoming.items():
+        current = existing.get(key)
+        if current is None:
+            inserts.append(dict(zip(STOCK_INPUT_FIELDS, key + values)))
+        elif current[1] != values:
+            row: Dict[str, Any] = dict(zip(STOCK_VALUE_FIELDS, values))
+            row["_id"] = current[0]
+            updates.append(row)
+        else:
+            unchanged += 1
+    diffed = time.perf_counter()
+
+    for ids in _batches(deletes, batch_size):
+        session.execute(delete(table).where(table.c.id.in_(ids)))
+    update_statement = update(table).where(table.c.id == bindparam("_id"))
+    for batch in _batches(updates, batch_size):
+        session.connection().execute(update_statement, list(batch))
+    for batch in _batches(inserts, batch_size):
+        session.execute(insert(table), list(batch))
+    if deletes or updates or inserts:
+        bump_catalog_version(session)
+    session.commit()
+    written = time.perf_counter()
+
+    return StockIngestReport(
+        received=received,
+        inserted=len(inserts),
+        updated=len(updates),
+        deleted=len(deletes),
+        unchanged=unchanged,
+        fetch_seconds=round(fetched - started, 3),
+        diff_seconds=round(diffed - fetched, 3),
+        write_seconds=round(written - diffed, 3),
+        total_seconds=round(written - started, 3),
+    )
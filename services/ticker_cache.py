@@ -0,0 +1,129 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from config import (
+    TICKER_CACHE_MAX_BYTES,
+    TICKER_CACHE_MAX_ENTRIES,
+    TICKER_CACHE_TTL_SECONDS,
+)
+from models.ticker_data import TickerCacheStats
+
+ENTRY_OVERHEAD_BYTES = 200
+ROW_OVERHEAD_BYTES = 120
+
+TickerRows = List[Dict[str, Any]]
+
+
+class CacheEntry(NamedTuple):
+    rows: TickerRows
+    complete: bool
+    size: int
+    expires_at: float
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+def estimate_size(query: str, rows: TickerRows) -> int:
+    size = ENTRY_OVERHEAD_BYTES + len(query)
+    for row in rows:
+        size += ROW_OVERHEAD_BYTES
+        for value in row.values():
+            size += len(value) if isinstance(value, str) else 8
+    return size
+
+
+def matches_query(row: Dict[str, Any], query: str) -> bool:
+    return (
+        query in (row.get("symbol") or "").lower()
+        or query in (row.get("name") or "").lower()
+    )
+
+
+class TickerSearchCache:
+    def __init__(
+        self,
+        max_entries: int = TICKER_CACHE_MAX_ENTRIES,
+        max_bytes: int = TICKER_CACHE_MAX_BYTES,
+        ttl_seconds: float = TICKER_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get(self, query: str, now: float) -> Optional[CacheEntry]:
+        entry = self.entries.get(query)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(query)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(query)
+        return entry
+
+    def _remove(self, query: str) -> None:
+        entry = self.entries.pop(query)
+        self.bytes -= entry.size
+
+    def lookup(self, query: str) -> Optional[TickerRows]:
+        now = self.clock()
+        entry = self._get(query, now)
+        if entry is not None:
+            self.hits += 1
+            return entry.rows
+        for length in range(len(query) - 1, 0, -1):
+            prefix_entry = self._get(query[:length], now)
+            if prefix_entry is not None and prefix_entry.complete:
+                rows = [row for row in prefix_entry.rows if matches_query(row, query)]
+                self._put(query, rows, True, prefix_entry.expires_at)
+                self.prefix_hits += 1
+                return rows
+        self.misses += 1
+        return None
+
+    def store(self, query: str, rows: TickerRows, complete: bool) -> None:
+        self._put(query, rows, complete, self.clock() + self.ttl_seconds)
+
+    def _put(
+        self, query: str, rows: TickerRows, complete: bool, expires_at: float
+    ) -> None:
+        size = estimate_size(query, rows)
+        if size > self.max_bytes:
+            return
+        if query in self.entries:
+            self._remove(query)
+        self.entries[query] = CacheEntry(rows, complete, size, expires_at)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> TickerCacheStats:
+        lookups = self.hits + self.prefix_hits + self.misses
+        return TickerCacheStats(
+            hits=self.hits,
+            prefix_hits=self.prefix_hits,
+            misses=self.misses,
+            hit_ratio=(self.hits + self.prefix_hits) / lookups if lookups else 0.0,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            entries=len(self.entries),
+            bytes=self.bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+        )
@@ -1,25 +1,51 @@
-from typing import List
 from fastapi import HTTPException, Query
-import requests
-from config import API_KEY, FINANCIAL_API_BASE_URL
-from models.ticker_data import TickerData
+from config import API_KEY, FINANCIAL_API_BASE_URL, TICKER_SEARCH_LIMIT
+from metrics import coalesced_requests_in_flight
+from models.ticker_data import TickerCacheStats
+from services.single_flight import SingleFlight
+from services.ticker_cache import TickerRows, TickerSearchCache, normalize_query
+from services.upstream_client import UpstreamClient
 
 
 SEARCH_TICKER_URL = f"{FINANCIAL_API_BASE_URL}/search-ticker"
 
+ticker_cache = TickerSearchCache()
+ticker_flights: SingleFlight[TickerRows] = SingleFlight()
 
-def get_ticker_list(
-    query: str = Query(..., title="Query", description="Query for the ticker list.")
-) -> List[TickerData]:
+coalesced_requests_in_flight.track(
+    lambda: {("ticker_search",): ticker_flights.in_flight()}
+)
+
+
+async def _search_tickers(client: UpstreamClient, query: str) -> TickerRows:
     params = {
         "apikey": API_KEY,
         "query": query,
+        "limit": TICKER_SEARCH_LIMIT,
     }
 
-    response = requests.get(SEARCH_TICKER_URL, params=params)
+    response = await client.get(SEARCH_TICKER_URL, params=params)
 
     if response.status_code == 200:
-        data: List[TickerData] = response.json()
+        data: TickerRows = response.json()
+        ticker_cache.store(query, data, len(data) < TICKER_SEARCH_LIMIT)
         return data
     else:
         raise HTTPException(status_code=response.status_code, detail="Unexpected error")
+
+
+async def get_ticker_list(
+    client: UpstreamClient,
+    query: str = Query(..., title="Query", description="Query for the ticker list.")
+) -> TickerRows:
+    normalized_query = normalize_query(query)
+    data = ticker_cache.lookup(normalized_query)
+    if data is None:
+        data = await ticker_flights.do(
+            normalized_query, lambda: _search_tickers(client, normalized_query)
+        )
+    return data
+
+
+def get_ticker_cache_stats() -> TickerCacheStats:
+    return ticker_cache.stats()
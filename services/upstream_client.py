@@ -0,0 +1,92 @@
+import asyncio
+import random
+from typing import Any, Mapping, Optional
+from fastapi import HTTPException
+import httpx
+from config import (
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_KEEPALIVE_EXPIRY,
+    UPSTREAM_MAX_CONNECTIONS,
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+    UPSTREAM_RETRIES,
+    UPSTREAM_RETRY_BACKOFF,
+    UPSTREAM_TIMEOUT,
+)
+from metrics import span, upstream_requests_in_flight, upstream_responses
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamClient:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        retries: int = UPSTREAM_RETRIES,
+        backoff: float = UPSTREAM_RETRY_BACKOFF,
+    ) -> None:
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+
+    async def get(
+        self, url: str, params: Optional[Mapping[str, Any]] = None
+    ) -> httpx.Response:
+        attempt = 0
+        host = httpx.URL(url).host
+        while True:
+            upstream_requests_in_flight.inc(host)
+            try:
+                with span("upstream"):
+                    response = await self.client.get(url, params=params)
+            except httpx.TransportError:
+                upstream_responses.inc(host, "error")
+                if attempt >= self.retries:
+                    raise HTTPException(
+                        status_code=502, detail="Upstream service unavailable"
+                    )
+            else:
+                upstream_responses.inc(host, str(response.status_code))
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= self.retries
+                ):
+                    return response
+            finally:
+                upstream_requests_in_flight.dec(host)
+            await asyncio.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_client: Optional[UpstreamClient] = None
+
+
+def create_upstream_client() -> UpstreamClient:
+    return UpstreamClient(
+        httpx.AsyncClient(
+            timeout=httpx.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+        )
+    )
+
+
+def get_upstream_client() -> UpstreamClient:
+    # Only called on the event loop thread (the async dependency in main.py
+    # and the lifespan), so no lock is needed.
+    global _client
+    if _client is None:
+        _client = create_upstream_client()
+    return _client
+
+
+async def close_upstream_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,33 @@
+import os
+from pathlib import Path
+from typing import Iterator
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LAZY_STARTUP", "false")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("FINANCIAL_API_BASE_URL", "http://financial-api.test")
+os.environ.setdefault("TWELVE_DATA_BASE_URL", "http://twelve-data.test")
+
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import Engine  # noqa: E402
+from benchmarks.upstream_stub import create_stub_app  # noqa: E402
+from database import create_database_engine, migrate, set_engine  # noqa: E402
+from services.catalog_response import catalog_response_cache  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    migrate(engine)
+    set_engine(engine)
+    # Every test database starts at catalog version 0, so cached responses
+    # from an earlier test would match.
+    catalog_response_cache.clear()
+    yield engine
+    set_engine(None)
+
+
+@pytest.fixture
+def upstream_app() -> FastAPI:
+    return create_stub_app(latency_ms=0, jitter_ms=0, stocks=100, tickers=100)
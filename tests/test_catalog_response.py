@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlmodel import Session
+import services.stock_catalog as stock_catalog
+from config import CATALOG_CACHE_CONTROL
+from main import app
+from models.stock_data import StockData
+from services.stock_catalog import bump_catalog_version
+
+
+def _add_stock(engine: Engine, symbol: str) -> None:
+    with Session(engine) as session:
+        session.add(
+            StockData(
+                symbol=symbol,
+                name=f"{symbol} Inc",
+                currency="USD",
+                exchange="NASDAQ",
+                mic_code="XNGS",
+                country="United States",
+                type="Common Stock",
+            )
+        )
+        bump_catalog_version(session)
+        session.commit()
+
+
+def test_matching_etag_gets_not_modified(engine: Engine) -> None:
+    _add_stock(engine, "AAPL")
+    with TestClient(app) as client:
+        response = client.get("/country-data")
+        etag = response.headers["ETag"]
+
+        cached = client.get("/country-data", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == CATALOG_CACHE_CONTROL
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+
+def test_ingest_changes_the_etag(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(stock_catalog, "STOCK_CATALOG_CHECK_SECONDS", 0)
+    _add_stock(engine, "AAPL")
+    with TestClient(app) as client:
+        before = client.get("/stock-search", params={"country": "united"})
+        _add_stock(engine, "MSFT")
+        after = client.get(
+            "/stock-search",
+            params={"country": "united"},
+            headers={"If-None-Match": before.headers["ETag"]},
+        )
+
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert [row["symbol"] for row in after.json()] == ["AAPL", "MSFT"]
+
+
+def test_not_modified_repeats_the_encoded_etag(engine: Engine) -> None:
+    for index in range(50):
+        _add_stock(engine, f"S{index:03d}")
+    with TestClient(app) as client:
+        response = client.get(
+            "/stock-search",
+            params={"country": "united"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        etag = response.headers["ETag"]
+
+        cached = client.get(
+            "/stock-search",
+            params={"country": "united"},
+            headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session
+import database
+import services.stock_catalog as stock_catalog
+from main import app
+from models.stock_data import StockData
+
+
+def test_repeated_requests_reuse_pooled_connection(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with Session(engine) as session:
+        session.add(
+            StockData(
+                symbol="AAPL",
+                name="Apple Inc",
+                currency="USD",
+                exchange="NASDAQ",
+                mic_code="XNGS",
+                country="United States",
+                type="Common Stock",
+            )
+        )
+        session.commit()
+    engine.dispose()
+    assert isinstance(engine.pool, QueuePool)
+
+    connections: List[Any] = []
+    event.listen(
+        engine, "connect", lambda connection, record: connections.append(connection)
+    )
+    # Check the catalog version on every request, so each one queries the
+    # database.
+    monkeypatch.setattr(stock_catalog, "STOCK_CATALOG_CHECK_SECONDS", 0)
+
+    with TestClient(app) as client:
+        for _ in range(5):
+            response = client.get("/stock-search", params={"country": "united"})
+            assert response.status_code == 200
+            assert engine.pool.checkedout() == 0
+
+    assert len(connections) == 1
+
+
+def test_concurrent_first_calls_create_one_engine(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    created: List[Engine] = []
+    create_database_engine = database.create_database_engine
+
+    def slow_create_database_engine() -> Engine:
+        time.sleep(0.05)
+        engine = create_database_engine("sqlite://")
+        created.append(engine)
+        return engine
+
+    monkeypatch.setattr(database, "create_database_engine", slow_create_database_engine)
+    database.set_engine(None)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            engines = list(executor.map(lambda _: database.get_engine(), range(8)))
+    finally:
+        database.set_engine(None)
+
+    assert len(created) == 1
+    assert all(engine is created[0] for engine in engines)
@@ -0,0 +1,145 @@
+import asyncio
+import functools
+from collections import Counter
+from datetime import date
+from typing import Any, List
+import httpx
+import pytest
+from sqlalchemy import Engine
+import services.historical_price_service as historical_price_service
+from benchmarks.upstream_stub import make_historical_bars
+from models.historical_price import HistoricalPriceBatchResponse
+from services.historical_price_service import get_historical_price_batch
+from services.single_flight import SingleFlight
+from services.upstream_client import UpstreamClient
+
+
+class StandIn:
+    # Serves stub bars for every symbol except MISSING (404) and BROKEN (500),
+    # and records the calls and the most concurrent ones.
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        symbol = request.url.path.rsplit("/", 1)[-1]
+        self.calls[symbol] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.in_flight -= 1
+        if symbol == "MISSING":
+            return httpx.Response(404)
+        if symbol == "BROKEN":
+            return httpx.Response(500)
+        bars = make_historical_bars(
+            symbol,
+            date.fromisoformat(request.url.params["from"]),
+            date.fromisoformat(request.url.params["to"]),
+        )
+        return httpx.Response(200, json={"symbol": symbol, "historical": bars})
+
+
+def _batches(
+    stand_in: StandIn, batches: List[List[str]]
+) -> List[HistoricalPriceBatchResponse]:
+    async def run() -> List[HistoricalPriceBatchResponse]:
+        client = UpstreamClient(
+            httpx.AsyncClient(transport=httpx.MockTransport(stand_in)),
+            retries=0,
+        )
+        try:
+            return list(
+                await asyncio.gather(
+                    *(
+                        get_historical_price_batch(
+                            client, symbols, "2024-02-01", "2024-02-09"
+                        )
+                        for symbols in batches
+                    )
+                )
+            )
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_single_flight_coalesces_concurrent_calls() -> None:
+    calls: List[str] = []
+
+    async def work(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def run() -> List[str]:
+        flights: SingleFlight[str] = SingleFlight()
+        results = await asyncio.gather(
+            *(flights.do(key, functools.partial(work, key)) for key in "aaab")
+        )
+        assert flights.in_flight() == 0
+        return list(results)
+
+    assert asyncio.run(run()) == ["A", "A", "A", "B"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_single_flight_shares_errors_and_forgets_the_call() -> None:
+    calls: List[int] = []
+
+    async def fail() -> Any:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run() -> List[Any]:
+        flights: SingleFlight[Any] = SingleFlight()
+        results = list(
+            await asyncio.gather(
+                flights.do("key", fail), flights.do("key", fail), return_exceptions=True
+            )
+        )
+        results.append(await flights.do("key", lambda: asyncio.sleep(0, "retried")))
+        return results
+
+    first, second, retried = asyncio.run(run())
+
+    assert isinstance(first, ValueError) and isinstance(second, ValueError)
+    assert retried == "retried"
+    assert len(calls) == 1
+
+
+def test_batch_isolates_errors_per_symbol(engine: Engine) -> None:
+    [response] = _batches(StandIn(), [["AAPL", "MISSING", "BROKEN", "MSFT"]])
+
+    statuses = {item.symbol: item.status_code for item in response.results}
+    assert statuses == {"AAPL": 200, "MISSING": 404, "BROKEN": 500, "MSFT": 200}
+    [aapl] = [item for item in response.results if item.symbol == "AAPL"]
+    assert aapl.data is not None and aapl.data.historical is not None
+    assert len(aapl.data.historical) == 7
+
+
+def test_concurrent_batches_share_upstream_calls(engine: Engine) -> None:
+    stand_in = StandIn()
+
+    _batches(stand_in, [["AAPL", "MSFT"], ["MSFT", "AAPL"], ["AAPL"]])
+
+    assert stand_in.calls == {"AAPL": 1, "MSFT": 1}
+
+
+def test_upstream_fetches_are_capped_across_batches(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        historical_price_service, "HISTORICAL_PRICE_UPSTREAM_CONCURRENCY", 3
+    )
+    stand_in = StandIn()
+
+    _batches(stand_in, [[f"A{index}" for index in range(6)], ["B0", "B1", "B2"]])
+
+    assert sum(stand_in.calls.values()) == 9
+    assert stand_in.max_in_flight == 3
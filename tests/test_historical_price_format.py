@@ -0,0 +1,121 @@
+import json
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import pytest
+from benchmarks.upstream_stub import make_historical_bars
+from services.historical_price_format import (
+    BINARY_MAGIC,
+    BINARY_MEDIA_TYPE,
+    BINARY_TYPECODES,
+    BINARY_VERSION,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    HistoricalPriceColumns,
+    columns_from_bars,
+    negotiate_media_type,
+    to_binary,
+    to_columnar_json,
+)
+
+TYPECODES = {"<f8": "d", "<i8": "q"}
+EPOCH = date(1970, 1, 1)
+
+
+def parse_binary(payload: bytes) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    assert payload[:4] == BINARY_MAGIC
+    version, header_length = struct.unpack_from("<HI", payload, 4)
+    assert version == BINARY_VERSION
+    header_end = 10 + header_length
+    header = json.loads(payload[10:header_end])
+    data_start = header_end + (-header_end % 8)
+    assert payload[header_end:data_start] == b"\0" * (data_start - header_end)
+
+    columns: Dict[str, List[Any]] = {}
+    for field in header["fields"]:
+        assert field["offset"] % 8 == 0
+        start = data_start + field["offset"]
+        values = array(TYPECODES[field["dtype"]])
+        values.frombytes(payload[start : start + 8 * header["count"]])
+        if sys.byteorder == "big":
+            values.byteswap()
+        columns[field["name"]] = values.tolist()
+    return header, columns
+
+
+def test_binary_round_trip() -> None:
+    bars = make_historical_bars("AAPL", date(2024, 1, 1), date(2024, 3, 1))
+    columns = columns_from_bars(bars)
+
+    header, decoded = parse_binary(to_binary("AAPL", columns))
+
+    assert header["symbol"] == "AAPL"
+    assert header["count"] == len(bars)
+    assert [field["name"] for field in header["fields"]] == ["date"] + list(
+        BINARY_TYPECODES
+    )
+    assert [EPOCH + timedelta(days=day) for day in decoded["date"]] == [
+        date.fromisoformat(value) for value in columns["date"]
+    ]
+    for field in BINARY_TYPECODES:
+        assert decoded[field] == list(columns[field])
+    assert "label" not in decoded
+
+
+def test_binary_buffers_are_aligned_for_odd_counts() -> None:
+    bars = make_historical_bars("MSFT", date(2024, 1, 1), date(2024, 1, 3))
+    payload = to_binary("MSFT", columns_from_bars(bars))
+
+    header, decoded = parse_binary(payload)
+
+    assert header["count"] == 3
+    assert len(payload) % 8 == 0
+    assert decoded["volume"] == [bar["volume"] for bar in bars]
+
+
+def test_binary_empty_result() -> None:
+    empty: HistoricalPriceColumns = {}
+    payload = to_binary("NONE", empty)
+
+    header, decoded = parse_binary(payload)
+
+    assert header["count"] == 0
+    assert all(field["offset"] == 0 for field in header["fields"])
+    assert all(values == [] for values in decoded.values())
+    header_end = 10 + struct.unpack_from("<I", payload, 6)[0]
+    assert len(payload) == header_end + (-header_end % 8)
+
+
+def test_columnar_json_round_trip() -> None:
+    bars = make_historical_bars("AAPL", date(2024, 1, 1), date(2024, 1, 31))
+
+    payload = json.loads(to_columnar_json("AAPL", columns_from_bars(bars)))
+
+    assert payload["count"] == len(bars)
+    assert [
+        dict(zip(payload["columns"], row)) for row in zip(*payload["columns"].values())
+    ] == bars
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("", JSON_MEDIA_TYPE),
+        ("text/html", JSON_MEDIA_TYPE),
+        (COLUMNAR_JSON_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE),
+        ("application/octet-stream", BINARY_MEDIA_TYPE),
+        (f"{JSON_MEDIA_TYPE};q=0.5, {BINARY_MEDIA_TYPE}", BINARY_MEDIA_TYPE),
+        (
+            f"{BINARY_MEDIA_TYPE};q=0.2, {COLUMNAR_JSON_MEDIA_TYPE};q=0.8",
+            COLUMNAR_JSON_MEDIA_TYPE,
+        ),
+        (f"{BINARY_MEDIA_TYPE};q=0, {JSON_MEDIA_TYPE};q=0.1", JSON_MEDIA_TYPE),
+        (f"{COLUMNAR_JSON_MEDIA_TYPE}, {BINARY_MEDIA_TYPE}", COLUMNAR_JSON_MEDIA_TYPE),
+        (f"{BINARY_MEDIA_TYPE};q=bad, */*;q=0.1", JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate_media_type(accept: Optional[str], expected: str) -> None:
+    assert negotiate_media_type(accept) == expected
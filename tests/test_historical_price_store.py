@@ -0,0 +1,283 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import Engine
+import services.historical_price_service as historical_price_service
+from benchmarks.upstream_stub import make_historical_bars
+from database import create_database_engine, set_engine
+from services.historical_price_format import bars_from_columns
+from services.historical_price_service import get_historical_columns
+from models.historical_price_bar import HistoricalPriceRange
+from services.historical_price_store import (
+    MAX_GAPS_PER_REQUEST,
+    DateRange,
+    _compact_coverage,
+    covered_ranges,
+    load_bar_columns,
+    missing_ranges,
+    save_bars,
+)
+
+NOW = datetime(2024, 3, 10, 15, 0)
+FRESH = NOW - timedelta(seconds=60)
+STALE = NOW - timedelta(hours=1)
+Coverage = List[Tuple[date, date, datetime]]
+from services.upstream_client import UpstreamClient
+
+
+def _coverage(items: Coverage) -> List[HistoricalPriceRange]:
+    return [
+        HistoricalPriceRange(
+            symbol="AAPL", date_start=start, date_end=end, fetched_at=fetched_at
+        )
+        for start, end, fetched_at in items
+    ]
+
+
+def _dates(bars: Sequence[Dict[str, Any]]) -> List[str]:
+    return [bar["date"] for bar in bars]
+
+
+def _get_columns(
+    upstream_app: FastAPI, ranges: Sequence[Sequence[str]]
+) -> List[List[Dict[str, Any]]]:
+    async def run() -> List[List[Dict[str, Any]]]:
+        client = UpstreamClient(
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=upstream_app)  # type: ignore[arg-type]
+            )
+        )
+        try:
+            results = await asyncio.gather(
+                *(
+                    get_historical_columns(client, "AAPL", start, end)
+                    for start, end in ranges
+                )
+            )
+        finally:
+            await client.aclose()
+        return [bars_from_columns(columns) for columns in results]
+
+    return asyncio.run(run())
+
+
+def test_save_bars_overwrites_existing_bars(engine: Engine) -> None:
+    first = make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 2, 20))
+    second = make_historical_bars("AAPL", date(2024, 2, 10), date(2024, 3, 1))
+
+    assert save_bars("AAPL", [(date(2024, 2, 1), date(2024, 2, 20))], first + first)
+    assert save_bars("AAPL", [(date(2024, 2, 10), date(2024, 3, 1))], second)
+
+    columns = load_bar_columns("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    expected = make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    assert bars_from_columns(columns) == expected
+
+
+def test_save_bars_reports_failed_write(tmp_path: Path) -> None:
+    set_engine(create_database_engine(f"sqlite:///{tmp_path / 'empty.db'}"))
+    try:
+        bars = make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 2, 20))
+        assert not save_bars("AAPL", [(date(2024, 2, 1), date(2024, 2, 20))], bars)
+    finally:
+        set_engine(None)
+
+
+def test_unreadable_store_falls_back_to_upstream(
+    tmp_path: Path, upstream_app: FastAPI
+) -> None:
+    set_engine(create_database_engine(f"sqlite:///{tmp_path / 'empty.db'}"))
+    try:
+        [bars] = _get_columns(upstream_app, [("2024-02-01", "2024-02-20")])
+    finally:
+        set_engine(None)
+
+    assert bars == make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 2, 20))
+
+
+def test_overlapping_requests_return_all_bars(
+    engine: Engine, upstream_app: FastAPI
+) -> None:
+    ranges = [("2024-02-01", "2024-02-20"), ("2024-02-10", "2024-03-01")]
+
+    results = _get_columns(upstream_app, ranges)
+
+    for (start, end), bars in zip(ranges, results):
+        expected = make_historical_bars(
+            "AAPL", date.fromisoformat(start), date.fromisoformat(end)
+        )
+        assert _dates(bars) == _dates(expected)
+
+
+def test_unsaved_bars_are_merged_with_stored_bars(
+    engine: Engine, upstream_app: FastAPI, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    stored = make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 2, 9))
+    assert save_bars("AAPL", [(date(2024, 2, 1), date(2024, 2, 9))], stored)
+    monkeypatch.setattr(historical_price_service, "save_bars", lambda *args: False)
+
+    [bars] = _get_columns(upstream_app, [("2024-02-01", "2024-03-01")])
+
+    expected = make_historical_bars("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    assert bars == expected
+    columns = load_bar_columns("AAPL", date(2024, 2, 1), date(2024, 3, 1))
+    assert bars_from_columns(columns) == stored
+
+
+@pytest.mark.parametrize(
+    "coverage, start, end, expected",
+    [
+        # Nothing stored: the whole range is missing.
+        (
+            [],
+            date(2024, 3, 1),
+            date(2024, 3, 10),
+            [(date(2024, 3, 1), date(2024, 3, 10))],
+        ),
+        # The fetch day is trusted while the range is fresh.
+        (
+            [(date(2024, 3, 1), date(2024, 3, 10), FRESH)],
+            date(2024, 3, 1),
+            date(2024, 3, 10),
+            [],
+        ),
+        # Once stale, only the days before the fetch day are final.
+        (
+            [(date(2024, 3, 1), date(2024, 3, 10), STALE)],
+            date(2024, 3, 1),
+            date(2024, 3, 10),
+            [(date(2024, 3, 10), date(2024, 3, 10))],
+        ),
+        # Days after the fetch day are trusted only while fresh.
+        (
+            [(date(2024, 3, 1), date(2024, 3, 20), FRESH)],
+            date(2024, 3, 1),
+            date(2024, 3, 15),
+            [],
+        ),
+        (
+            [(date(2024, 3, 1), date(2024, 3, 20), STALE)],
+            date(2024, 3, 1),
+            date(2024, 3, 15),
+            [(date(2024, 3, 10), date(2024, 3, 15))],
+        ),
+        # Ranges fetched on earlier days are final, however old.
+        (
+            [(date(2024, 1, 1), date(2024, 1, 31), datetime(2024, 2, 5))],
+            date(2024, 1, 1),
+            date(2024, 1, 31),
+            [],
+        ),
+        # Adjacent ranges merge into one covered range.
+        (
+            [
+                (date(2024, 3, 1), date(2024, 3, 4), STALE),
+                (date(2024, 3, 5), date(2024, 3, 8), STALE),
+            ],
+            date(2024, 3, 1),
+            date(2024, 3, 8),
+            [],
+        ),
+        # Gaps before, between and after the covered ranges.
+        (
+            [
+                (date(2024, 3, 2), date(2024, 3, 3), STALE),
+                (date(2024, 3, 6), date(2024, 3, 7), STALE),
+            ],
+            date(2024, 3, 1),
+            date(2024, 3, 9),
+            [
+                (date(2024, 3, 1), date(2024, 3, 1)),
+                (date(2024, 3, 4), date(2024, 3, 5)),
+                (date(2024, 3, 8), date(2024, 3, 9)),
+            ],
+        ),
+        # More gaps than MAX_GAPS_PER_REQUEST collapse into one request.
+        (
+            [
+                (date(2024, 2, day), date(2024, 2, day), STALE)
+                for day in range(2, 2 * MAX_GAPS_PER_REQUEST + 2, 2)
+            ],
+            date(2024, 2, 1),
+            date(2024, 2, 2 * MAX_GAPS_PER_REQUEST + 1),
+            [(date(2024, 2, 1), date(2024, 2, 2 * MAX_GAPS_PER_REQUEST + 1))],
+        ),
+    ],
+)
+def test_missing_ranges(
+    coverage: Coverage, start: date, end: date, expected: List[DateRange]
+) -> None:
+    assert missing_ranges(_coverage(coverage), start, end, NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "coverage, expected",
+    [
+        (
+            [
+                (date(2024, 3, 5), date(2024, 3, 8), STALE),
+                (date(2024, 3, 1), date(2024, 3, 4), STALE),
+            ],
+            [(date(2024, 3, 1), date(2024, 3, 8))],
+        ),
+        (
+            [
+                (date(2024, 3, 1), date(2024, 3, 6), STALE),
+                (date(2024, 3, 4), date(2024, 3, 8), STALE),
+            ],
+            [(date(2024, 3, 1), date(2024, 3, 8))],
+        ),
+        (
+            [
+                (date(2024, 3, 1), date(2024, 3, 3), STALE),
+                (date(2024, 3, 5), date(2024, 3, 8), STALE),
+            ],
+            [
+                (date(2024, 3, 1), date(2024, 3, 3)),
+                (date(2024, 3, 5), date(2024, 3, 8)),
+            ],
+        ),
+        (
+            [(date(2024, 3, 1), date(2024, 3, 12), STALE)],
+            [(date(2024, 3, 1), date(2024, 3, 9))],
+        ),
+    ],
+)
+def test_covered_ranges(coverage: Coverage, expected: List[DateRange]) -> None:
+    assert covered_ranges(_coverage(coverage), NOW) == expected
+
+
+def test_compact_coverage_keeps_fresh_fetch_days_apart() -> None:
+    earlier = NOW - timedelta(days=3)
+    coverage = _coverage(
+        [
+            (date(2024, 3, 1), date(2024, 3, 4), earlier),
+            (date(2024, 3, 5), date(2024, 3, 12), FRESH),
+            (date(2024, 2, 20), date(2024, 2, 28), STALE),
+        ]
+    )
+
+    compacted = [
+        (item.date_start, item.date_end, item.fetched_at)
+        for item in _compact_coverage("AAPL", coverage, NOW)
+    ]
+
+    assert compacted == [
+        (date(2024, 2, 20), date(2024, 2, 28), FRESH),
+        (date(2024, 3, 1), date(2024, 3, 9), FRESH),
+        (date(2024, 3, 10), date(2024, 3, 12), FRESH),
+    ]
+
+
+def test_compact_coverage_drops_stale_fetch_days() -> None:
+    coverage = _coverage([(date(2024, 3, 1), date(2024, 3, 12), STALE)])
+
+    compacted = [
+        (item.date_start, item.date_end)
+        for item in _compact_coverage("AAPL", coverage, NOW)
+    ]
+
+    assert compacted == [(date(2024, 3, 1), date(2024, 3, 9))]
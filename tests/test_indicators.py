@@ -0,0 +1,260 @@
+import math
+import statistics
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pytest
+from services.analytics_service import (
+    _correlation,
+    _price_arrays,
+    build_analytics,
+    compute_indicators,
+)
+from services.historical_price_format import HistoricalPriceColumns
+from services.indicators import FloatArray, correlation_matrix, log_returns
+
+Series = List[Optional[float]]
+
+TOLERANCE = 1e-9
+
+
+def reference_sma(prices: List[float], window: int) -> Series:
+    return [
+        None if i + 1 < window else sum(prices[i + 1 - window : i + 1]) / window
+        for i in range(len(prices))
+    ]
+
+
+def reference_ema(prices: List[float], window: int) -> Series:
+    alpha = 2.0 / (window + 1)
+    result: Series = []
+    previous = prices[0]
+    for price in prices:
+        previous = (1 - alpha) * previous + alpha * price
+        result.append(previous)
+    return result
+
+
+def reference_log_returns(prices: List[float]) -> Series:
+    return [None] + [math.log(b / a) for a, b in zip(prices, prices[1:])]
+
+
+def reference_volatility(prices: List[float], window: int) -> Series:
+    returns = reference_log_returns(prices)
+    result: Series = []
+    for i in range(len(prices)):
+        if i < window:
+            result.append(None)
+        else:
+            sample = [r for r in returns[i + 1 - window : i + 1] if r is not None]
+            result.append(statistics.stdev(sample) * math.sqrt(252))
+    return result
+
+
+def reference_rsi(prices: List[float], window: int) -> Series:
+    deltas = [b - a for a, b in zip(prices, prices[1:])]
+    result: Series = [None] * min(window, len(prices))
+    if len(prices) <= window:
+        return result
+    gain = sum(max(d, 0) for d in deltas[:window]) / window
+    loss = sum(max(-d, 0) for d in deltas[:window]) / window
+    for i in range(window, len(prices)):
+        if i > window:
+            delta = deltas[i - 1]
+            gain = (gain * (window - 1) + max(delta, 0)) / window
+            loss = (loss * (window - 1) + max(-delta, 0)) / window
+        result.append(50.0 if gain + loss == 0 else 100 * gain / (gain + loss))
+    return result
+
+
+def reference_drawdown(prices: List[float]) -> Series:
+    peak = -math.inf
+    result: Series = []
+    for price in prices:
+        peak = max(peak, price)
+        result.append(price / peak - 1)
+    return result
+
+
+def reference_indicators(prices: List[float]) -> Dict[str, Series]:
+    return {
+        "sma_20": reference_sma(prices, 20),
+        "sma_200": reference_sma(prices, 200),
+        "ema_12": reference_ema(prices, 12),
+        "ema_200": reference_ema(prices, 200),
+        "log_return": reference_log_returns(prices),
+        "volatility_21": reference_volatility(prices, 21),
+        "rsi_14": reference_rsi(prices, 14),
+        "drawdown": reference_drawdown(prices),
+    }
+
+
+def reference_pearson(first: Sequence[float], second: Sequence[float]) -> float:
+    first_mean, second_mean = statistics.fmean(first), statistics.fmean(second)
+    covariance = sum(
+        (a - first_mean) * (b - second_mean) for a, b in zip(first, second)
+    )
+    first_spread = math.sqrt(sum((a - first_mean) ** 2 for a in first))
+    second_spread = math.sqrt(sum((b - second_mean) ** 2 for b in second))
+    return covariance / (first_spread * second_spread)
+
+
+def reference_correlation(returns: Sequence[Sequence[float]]) -> List[List[float]]:
+    return [[reference_pearson(a, b) for b in returns] for a in returns]
+
+
+def as_array(values: Sequence[Optional[float]]) -> FloatArray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def max_difference(expected: Sequence[Optional[float]], actual: FloatArray) -> float:
+    reference = as_array(expected)
+    if not np.array_equal(np.isnan(reference), np.isnan(actual)):
+        return math.inf
+    mask = ~np.isnan(reference)
+    scale = np.maximum(np.abs(reference[mask]), 1.0)
+    return float(np.max(np.abs(reference[mask] - actual[mask]) / scale, initial=0.0))
+
+
+def make_prices(bars: int, symbols: int, seed: int = 7) -> FloatArray:
+    generator = np.random.default_rng(seed)
+    returns = generator.normal(0.0003, 0.015, size=(symbols, bars))
+    prices: FloatArray = 100.0 * np.exp(np.cumsum(returns, axis=1))
+    return prices
+
+
+def make_columns(
+    prices: Sequence[float], days: Sequence[date]
+) -> HistoricalPriceColumns:
+    # Newest first, as the bar store returns them.
+    return {
+        "date": [day.isoformat() for day in reversed(days)],
+        "adjClose": list(reversed(prices)),
+        "close": list(reversed(prices)),
+    }
+
+
+@pytest.fixture(scope="module")
+def prices() -> FloatArray:
+    # Ten years of daily bars.
+    prices: FloatArray = make_prices(10 * 252, 1)[0]
+    return prices
+
+
+@pytest.fixture(scope="module")
+def vectorized(prices: FloatArray) -> Dict[str, FloatArray]:
+    return compute_indicators(
+        prices,
+        ["sma", "ema", "log_return", "volatility", "rsi", "drawdown"],
+        [20, 200],
+        [12, 200],
+        21,
+        14,
+    )
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "sma_20",
+        "sma_200",
+        "ema_12",
+        "ema_200",
+        "log_return",
+        "volatility_21",
+        "rsi_14",
+        "drawdown",
+    ],
+)
+def test_indicators_match_reference(
+    prices: FloatArray, vectorized: Dict[str, FloatArray], name: str
+) -> None:
+    expected = reference_indicators(prices.tolist())[name]
+
+    assert max_difference(expected, vectorized[name]) < TOLERANCE
+
+
+def test_correlation_matrix_matches_reference() -> None:
+    returns = [log_returns(row)[1:] for row in make_prices(500, 4)]
+
+    expected = reference_correlation([row.tolist() for row in returns])
+    actual = correlation_matrix(returns)
+
+    for expected_row, actual_row in zip(expected, actual):
+        assert max_difference(expected_row, actual_row) < TOLERANCE
+
+
+def test_correlation_uses_common_dates() -> None:
+    first, second = make_prices(60, 2).tolist()
+    days = [date(2024, 1, 1) + timedelta(days=offset) for offset in range(60)]
+    first_days = [day for index, day in enumerate(days) if index % 7 != 3]
+    second_days = [day for index, day in enumerate(days) if index % 5 != 1]
+    first_prices = [p for p, day in zip(first, days) if day in first_days]
+    second_prices = [p for p, day in zip(second, days) if day in second_days]
+
+    correlation = _correlation(
+        ["AAA", "BBB"],
+        [
+            _price_arrays(make_columns(first_prices, first_days), "adjClose"),
+            _price_arrays(make_columns(second_prices, second_days), "adjClose"),
+        ],
+    )
+
+    common = sorted(set(first_days) & set(second_days))
+    first_common = [p for p, day in zip(first_prices, first_days) if day in common]
+    second_common = [p for p, day in zip(second_prices, second_days) if day in common]
+    expected = reference_correlation(
+        [
+            reference_log_returns(first_common)[1:],  # type: ignore[list-item]
+            reference_log_returns(second_common)[1:],  # type: ignore[list-item]
+        ]
+    )
+    assert correlation is not None
+    assert correlation.observations == len(common) - 1
+    for expected_row, actual_row in zip(expected, correlation.matrix):
+        assert max_difference(expected_row, as_array(actual_row)) < TOLERANCE
+
+
+def test_correlation_needs_overlapping_dates() -> None:
+    days = [date(2024, 1, 1) + timedelta(days=offset) for offset in range(10)]
+    first, second = make_prices(5, 2).tolist()
+
+    correlation = _correlation(
+        ["AAA", "BBB"],
+        [
+            _price_arrays(make_columns(first, days[:5]), "adjClose"),
+            _price_arrays(make_columns(second, days[5:]), "adjClose"),
+        ],
+    )
+
+    assert correlation is not None
+    assert correlation.observations == 0
+    assert correlation.matrix == []
+
+
+def test_build_analytics_runs_oldest_first() -> None:
+    prices = make_prices(30, 1)[0].tolist()
+    days = [date(2024, 1, 1) + timedelta(days=offset) for offset in range(30)]
+
+    response = build_analytics(
+        ["AAA"],
+        [make_columns(prices, days)],
+        days[0].isoformat(),
+        days[-1].isoformat(),
+        ["sma", "log_return", "drawdown"],
+        [5],
+        [],
+        21,
+        14,
+        "adjClose",
+    )
+
+    [result] = response.results
+    assert result.date == [day.isoformat() for day in days]
+    assert result.price == prices
+    for name, expected in {
+        "sma_5": reference_sma(prices, 5),
+        "log_return": reference_log_returns(prices),
+        "drawdown": reference_drawdown(prices),
+    }.items():
+        assert max_difference(expected, as_array(result.indicators[name])) < TOLERANCE
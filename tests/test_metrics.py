@@ -0,0 +1,110 @@
+import re
+from typing import Dict, Iterator, List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlmodel import Session
+import main
+import metrics
+from main import app
+from metrics import PROMETHEUS_MEDIA_TYPE, Histogram
+from models.stock_data import StockData
+
+SERVER_TIMING_ENTRY = re.compile(r'^(\w+);dur=\d+\.\d(;desc="\d+ calls")?$')
+
+
+@pytest.fixture
+def client(engine: Engine) -> Iterator[TestClient]:
+    with Session(engine) as session:
+        session.add(
+            StockData(
+                symbol="AAPL",
+                name="Apple Inc",
+                currency="USD",
+                exchange="NASDAQ",
+                mic_code="XNGS",
+                country="United States",
+                type="Common Stock",
+            )
+        )
+        session.commit()
+    with TestClient(app) as client:
+        yield client
+
+
+def _samples(text: str, name: str) -> Dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith(name) and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def test_server_timing_lists_spans_and_total(client: TestClient) -> None:
+    response = client.get("/country-data")
+
+    assert response.status_code == 200
+
+    entries = response.headers["Server-Timing"].split(", ")
+    names: List[str] = []
+    for entry in entries:
+        match = SERVER_TIMING_ENTRY.match(entry)
+        assert match, entry
+        names.append(match.group(1))
+    assert {"handler", "response"} <= set(names)
+    assert names[-1] == "total"
+
+
+def test_server_timing_can_be_disabled(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(metrics, "SERVER_TIMING_ENABLED", False)
+
+    assert "Server-Timing" not in client.get("/").headers
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value, "/")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/",le="0.01"} 2',
+        'latency_seconds_bucket{route="/",le="0.1"} 3',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/"} 2.065',
+        'latency_seconds_count{route="/"} 4',
+    ]
+
+
+def test_metrics_endpoint_exposes_request_histogram(client: TestClient) -> None:
+    client.get("/")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == PROMETHEUS_MEDIA_TYPE
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    labels = '{method="GET",route="/"'
+    buckets = _samples(response.text, f"http_request_duration_seconds_bucket{labels}")
+    counts = list(buckets.values())
+    assert list(buckets)[-1].endswith(',le="+Inf"}')
+    assert counts == sorted(counts)
+    assert (
+        _samples(response.text, "http_request_duration_seconds_count")[
+            f"http_request_duration_seconds_count{labels}}}"
+        ]
+        == counts[-1]
+    )
+    assert f"http_request_duration_seconds_sum{labels}}}" in response.text
+    assert f'http_requests_total{labels},status="200"}}' in response.text
+
+
+def test_metrics_endpoint_is_hidden_when_disabled(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main, "METRICS_ENABLED", False)
+
+    assert client.get("/metrics").status_code == 404
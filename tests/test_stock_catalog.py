@@ -0,0 +1,65 @@
+import random
+from typing import List, Optional
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Engine, insert
+from sqlmodel import Session
+from benchmarks.bench_stock_catalog import COUNTRIES, QUERIES, WORDS, make_listing
+from database import create_database_engine, migrate
+from models.stock_data import StockData
+from services.stock_catalog import StockCatalog, load_stock_catalog
+from services.stock_data_service import query_stock_list
+
+Filters = List[Optional[str]]
+
+
+def _random_filters(rng: random.Random) -> Filters:
+    def fragment(value: str) -> str:
+        start = rng.randint(0, len(value) - 1)
+        return value[start : start + rng.randint(0, 4)]
+
+    candidates = [
+        fragment(rng.choice(COUNTRIES)).swapcase(),
+        fragment(f"X{rng.choice(COUNTRIES)[:3].upper()}{rng.randint(0, 3)}"),
+        fragment("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+        fragment(" ".join(rng.choices(WORDS, k=2))).lower(),
+    ]
+    return [value if rng.random() < 0.4 else None for value in candidates]
+
+
+FILTERS: List[Filters] = [
+    [query.get(key) for key in ("country", "exchange", "symbol", "name")]
+    for query in QUERIES
+] + [_random_filters(random.Random(seed)) for seed in range(50)]
+
+
+@pytest.fixture(scope="module")
+def catalog_engine(tmp_path_factory: pytest.TempPathFactory) -> Engine:
+    path = tmp_path_factory.mktemp("catalog") / "catalog.db"
+    engine = create_database_engine(f"sqlite:///{path}")
+    migrate(engine)
+    with Session(engine) as session:
+        session.execute(insert(StockData), make_listing(2000, random.Random(7)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(scope="module")
+def catalog(catalog_engine: Engine) -> StockCatalog:
+    return load_stock_catalog(catalog_engine)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_matches_sql(
+    catalog_engine: Engine, catalog: StockCatalog, filters: Filters
+) -> None:
+    with Session(catalog_engine) as session:
+        try:
+            expected = {row.id for row in query_stock_list(session, *filters)}
+        except HTTPException as error:
+            assert error.status_code == 404
+            expected = set()
+
+    found = [catalog.ids[index] for index in catalog.search(*filters)]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
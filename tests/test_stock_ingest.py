@@ -0,0 +1,164 @@
+import json
+from typing import Any, Dict, List, Tuple
+import pytest
+import requests
+from fastapi import HTTPException
+from sqlalchemy import Engine, select
+from sqlmodel import Session
+from config import UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_TIMEOUT
+from models.stock_data import StockData
+from services import stock_data_service
+from services.stock_catalog import read_catalog_version
+from services.stock_ingest import ingest_stock_items, iter_data_items
+
+TABLE = StockData.__table__  # type: ignore[attr-defined]
+
+
+def _stock(symbol: str, mic_code: str = "XNGS", **values: str) -> Dict[str, Any]:
+    item = {
+        "symbol": symbol,
+        "name": f"{symbol} Inc",
+        "currency": "USD",
+        "exchange": "NASDAQ",
+        "mic_code": mic_code,
+        "country": "United States",
+        "type": "Common Stock",
+    }
+    item.update(values)
+    return item
+
+
+def _chunks(payload: bytes, size: int) -> List[bytes]:
+    return [payload[start : start + size] for start in range(0, len(payload), size)]
+
+
+def _stored(session: Session) -> List[Tuple[str, str, str]]:
+    rows = session.execute(
+        select(TABLE.c.symbol, TABLE.c.mic_code, TABLE.c.name).order_by(
+            TABLE.c.symbol, TABLE.c.mic_code
+        )
+    )
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+ITEMS = [
+    _stock("AAPL", name="Apple Inc"),
+    _stock("MÜNCH", "XETR", name="Münchener Rück", country="Germany"),
+    _stock("7203", "XTKS", name="トヨタ自動車", country="Japan"),
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_items_survive_any_chunk_boundary(size: int) -> None:
+    payload = json.dumps(
+        {"data": ITEMS, "count": len(ITEMS), "status": "ok"}, ensure_ascii=False
+    ).encode()
+
+    assert list(iter_data_items(_chunks(payload, size))) == ITEMS
+
+
+def test_multibyte_character_split_across_chunks() -> None:
+    payload = json.dumps({"data": [ITEMS[2]]}, ensure_ascii=False).encode()
+    split = payload.index("ト".encode()) + 1
+
+    assert list(iter_data_items([payload[:split], payload[split:]])) == [ITEMS[2]]
+
+
+def test_empty_data_yields_nothing() -> None:
+    assert list(iter_data_items([b'{"data": [], "status": "ok"}'])) == []
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"",
+        b'{"status": "error", "message": "limit reached"}',
+        b'{"data": [{"symbol": "AAPL"}, {"symb',
+        b'{"data": [{"symbol": "AAPL"}',
+    ],
+)
+def test_truncated_payload_is_a_bad_gateway(payload: bytes) -> None:
+    with pytest.raises(HTTPException) as error:
+        list(iter_data_items(_chunks(payload, 5)))
+    assert error.value.status_code == 502
+
+
+def test_ingest_inserts_updates_and_deletes_by_symbol_and_mic(engine: Engine) -> None:
+    with Session(engine) as session:
+        ingest_stock_items(
+            session,
+            [_stock("AAPL"), _stock("AAPL", "XLON"), _stock("MSFT"), _stock("IBM")],
+        )
+        version = read_catalog_version(session)
+
+        report = ingest_stock_items(
+            session,
+            [
+                _stock("AAPL"),
+                _stock("AAPL", "XLON", name="Apple London"),
+                _stock("MSFT"),
+                _stock("NVDA"),
+            ],
+        )
+
+        assert (report.received, report.inserted, report.updated) == (4, 1, 1)
+        assert (report.deleted, report.unchanged) == (1, 2)
+        assert _stored(session) == [
+            ("AAPL", "XLON", "Apple London"),
+            ("AAPL", "XNGS", "AAPL Inc"),
+            ("MSFT", "XNGS", "MSFT Inc"),
+            ("NVDA", "XNGS", "NVDA Inc"),
+        ]
+        assert read_catalog_version(session) == version + 1
+
+
+def test_unchanged_listing_keeps_the_catalog_version(engine: Engine) -> None:
+    items = [_stock("AAPL"), _stock("MSFT")]
+    with Session(engine) as session:
+        ingest_stock_items(session, items)
+        version = read_catalog_version(session)
+
+        report = ingest_stock_items(session, items)
+
+        assert (report.inserted, report.updated, report.deleted) == (0, 0, 0)
+        assert report.unchanged == 2
+        assert read_catalog_version(session) == version
+
+
+def test_duplicate_stored_keys_keep_the_oldest_row(engine: Engine) -> None:
+    with Session(engine) as session:
+        session.add_all(StockData(**_stock("AAPL", name=name)) for name in "ABC")
+        session.commit()
+        oldest = session.execute(select(TABLE.c.id).order_by(TABLE.c.id)).first()
+
+        report = ingest_stock_items(session, [_stock("AAPL", name="A")])
+
+        assert (report.deleted, report.unchanged) == (2, 1)
+        assert session.execute(select(TABLE.c.id)).all() == [oldest]
+
+
+def test_empty_listing_keeps_stored_rows(engine: Engine) -> None:
+    with Session(engine) as session:
+        ingest_stock_items(session, [_stock("AAPL")])
+
+        with pytest.raises(HTTPException) as error:
+            ingest_stock_items(session, iter_data_items([b'{"data": []}']))
+
+        assert error.value.status_code == 502
+        assert _stored(session) == [("AAPL", "XNGS", "AAPL Inc")]
+
+
+def test_listing_download_has_a_timeout(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: List[Dict[str, Any]] = []
+
+    def get(url: str, **kwargs: Any) -> Any:
+        calls.append(kwargs)
+        raise requests.Timeout()
+
+    monkeypatch.setattr(requests, "get", get)
+    with Session(engine) as session, pytest.raises(requests.Timeout):
+        stock_data_service.set_stock_data(session)
+
+    assert calls[0]["timeout"] == (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_TIMEOUT)
@@ -0,0 +1,75 @@
+from typing import Iterator, List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlmodel import Session
+from main import app
+from models.stock_data import StockData
+
+
+@pytest.fixture
+def client(engine: Engine) -> Iterator[TestClient]:
+    with Session(engine) as session:
+        session.add_all(
+            StockData(
+                symbol=f"S{index:03d}",
+                name=f"Stock {index}",
+                currency="USD",
+                exchange="NASDAQ",
+                mic_code="XNGS",
+                country="United States",
+                type="Common Stock",
+            )
+            for index in range(10)
+        )
+        session.commit()
+    with TestClient(app) as client:
+        yield client
+
+
+def test_pages_follow_the_next_cursor(client: TestClient) -> None:
+    symbols: List[str] = []
+    params = {"country": "united", "limit": "4"}
+    while True:
+        response = client.get("/stock-search", params=params)
+        assert response.status_code == 200
+        symbols.extend(row["symbol"] for row in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            assert "Link" not in response.headers
+            break
+        params = {**params, "cursor": next_cursor}
+
+    assert symbols == [f"S{index:03d}" for index in range(10)]
+
+
+def test_next_page_link_uses_the_current_request(client: TestClient) -> None:
+    first = client.get(
+        "http://first-host.example/stock-search?country=UNITED&limit=3&utm=abc"
+    )
+    second = client.get(
+        "http://second-host.example/stock-search?country=united&limit=3"
+    )
+
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["Link"] == (
+        "<http://first-host.example/stock-search"
+        '?country=UNITED&limit=3&utm=abc&cursor=3>; rel="next"'
+    )
+    assert second.headers["Link"] == (
+        "<http://second-host.example/stock-search"
+        '?country=united&limit=3&cursor=3>; rel="next"'
+    )
+
+
+def test_streamed_page_has_next_page_link(client: TestClient) -> None:
+    response = client.get(
+        "/stock-search",
+        params={"country": "united", "limit": "3"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+    assert response.headers["X-Next-Cursor"] == "3"
+    assert response.headers["Link"].startswith("<http://testserver/stock-search?")
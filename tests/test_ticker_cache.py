@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any, List
+import httpx
+import pytest
+import services.ticker_service as ticker_service
+from services.single_flight import SingleFlight
+from services.ticker_cache import TickerRows, TickerSearchCache, estimate_size
+from services.upstream_client import UpstreamClient
+
+TICKERS: TickerRows = [
+    {"symbol": "AAPL", "name": "Apple Inc."},
+    {"symbol": "APH", "name": "Amphenol Corporation"},
+    {"symbol": "MSFT", "name": "Microsoft Corporation"},
+    {"symbol": "SNAP", "name": "Snap Inc."},
+]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(clock: FakeClock, **limits: Any) -> TickerSearchCache:
+    return TickerSearchCache(clock=clock, **limits)
+
+
+def test_entries_expire_after_the_ttl() -> None:
+    clock = FakeClock()
+    cache = _cache(clock, ttl_seconds=10)
+    cache.store("aapl", TICKERS[:1], True)
+
+    clock.now = 9.9
+    assert cache.lookup("aapl") == TICKERS[:1]
+    clock.now = 10
+    assert cache.lookup("aapl") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.expirations) == (1, 1, 1)
+    assert (stats.entries, stats.bytes) == (0, 0)
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = _cache(FakeClock(), max_entries=2)
+    cache.store("a", TICKERS[:1], True)
+    cache.store("b", TICKERS[:1], True)
+    cache.lookup("a")
+    cache.store("c", TICKERS[:1], True)
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats().evictions == 1
+
+
+def test_entries_are_evicted_to_fit_the_byte_budget() -> None:
+    size = estimate_size("a", TICKERS)
+    cache = _cache(FakeClock(), max_bytes=2 * size)
+    for query in ("a", "b", "c"):
+        cache.store(query, TICKERS, True)
+
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.bytes == 2 * size
+
+    cache.store("d", TICKERS * 3, True)
+
+    assert "d" not in cache.entries
+    assert cache.bytes == 2 * size
+
+
+def test_prefix_reuse_filters_a_complete_entry() -> None:
+    clock = FakeClock()
+    cache = _cache(clock, ttl_seconds=10)
+    cache.store("ap", TICKERS, True)
+
+    clock.now = 4
+    assert cache.lookup("app") == [TICKERS[0]]
+    assert cache.lookup("app") == [TICKERS[0]]
+
+    stats = cache.stats()
+    assert (stats.hits, stats.prefix_hits, stats.misses) == (1, 1, 0)
+    assert cache.entries["app"].expires_at == cache.entries["ap"].expires_at == 10
+
+
+def test_prefix_reuse_skips_incomplete_entries() -> None:
+    cache = _cache(FakeClock())
+    cache.store("ap", TICKERS[:1], False)
+
+    assert cache.lookup("app") is None
+    assert cache.stats().misses == 1
+
+
+def test_concurrent_searches_share_one_upstream_call(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    queries: List[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        queries.append(request.url.params["query"])
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json=TICKERS[:1])
+
+    monkeypatch.setattr(ticker_service, "ticker_cache", TickerSearchCache())
+    monkeypatch.setattr(ticker_service, "ticker_flights", SingleFlight())
+
+    async def run() -> List[TickerRows]:
+        client = UpstreamClient(
+            httpx.AsyncClient(transport=httpx.MockTransport(handler)), retries=0
+        )
+        try:
+            results = await asyncio.gather(
+                *(
+                    ticker_service.get_ticker_list(client, query)
+                    for query in ("Apple", " apple", "APPLE  ", "apple")
+                )
+            )
+            results.append(await ticker_service.get_ticker_list(client, "apple"))
+            return results
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+
+    assert queries == ["apple"]
+    assert results == [TICKERS[:1]] * 5
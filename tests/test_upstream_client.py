@@ -0,0 +1,161 @@
+import asyncio
+from typing import Any, Callable, List, Optional
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+import main
+import services.upstream_client as upstream_client
+from services.historical_price_service import _request_historical_bars
+from services.upstream_client import UpstreamClient
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+def _mock_client(handler: Handler, retries: int = 2) -> UpstreamClient:
+    return UpstreamClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        retries=retries,
+        backoff=0,
+    )
+
+
+def _responses(*statuses: int) -> Handler:
+    remaining = list(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(remaining.pop(0), json={"historical": []})
+
+    return handler
+
+
+def _get(client: UpstreamClient, url: str = "http://upstream.test/prices") -> Any:
+    async def run() -> Any:
+        try:
+            return await client.get(url)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_get_retries_until_success() -> None:
+    response = _get(_mock_client(_responses(503, 503, 200)))
+
+    assert response.status_code == 200
+
+
+def test_get_returns_last_response_when_retries_run_out() -> None:
+    response = _get(_mock_client(_responses(503, 503, 503, 200)))
+
+    assert response.status_code == 503
+
+
+def test_get_maps_transport_errors_to_bad_gateway() -> None:
+    calls: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    with pytest.raises(HTTPException) as error:
+        _get(_mock_client(handler, retries=2))
+
+    assert error.value.status_code == 502
+    assert len(calls) == 3
+
+
+def _request_bars(client: UpstreamClient, symbol: str) -> Optional[List[Any]]:
+    async def run() -> Optional[List[Any]]:
+        try:
+            return await _request_historical_bars(
+                client, symbol, "2024-02-01", "2024-02-09"
+            )
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def _stub_client(upstream_app: FastAPI) -> UpstreamClient:
+    return UpstreamClient(
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=upstream_app)  # type: ignore[arg-type]
+        )
+    )
+
+
+def test_request_historical_bars_from_stand_in(upstream_app: FastAPI) -> None:
+    bars = _request_bars(_stub_client(upstream_app), "AAPL")
+
+    assert bars is not None
+    assert bars[0]["date"] == "2024-02-09"
+
+
+def test_request_historical_bars_maps_not_found_to_none(
+    upstream_app: FastAPI,
+) -> None:
+    assert _request_bars(_stub_client(upstream_app), "MISSING1") is None
+
+
+def test_request_historical_bars_maps_unauthorized() -> None:
+    with pytest.raises(HTTPException) as error:
+        _request_bars(_mock_client(_responses(401)), "AAPL")
+
+    assert error.value.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ({"symbol": "AAPL", "historical": []}, []),
+        ({}, None),
+        ([], None),
+    ],
+)
+def test_request_historical_bars_reads_the_historical_key(
+    body: Any, expected: Optional[List[Any]]
+) -> None:
+    client = _mock_client(lambda request: httpx.Response(200, json=body))
+
+    assert _request_bars(client, "AAPL") == expected
+
+
+def test_request_historical_bars_rejects_error_bodies() -> None:
+    client = _mock_client(
+        lambda request: httpx.Response(200, json={"Error Message": "Limit reached"})
+    )
+
+    with pytest.raises(HTTPException) as error:
+        _request_bars(client, "AAPL")
+
+    assert error.value.status_code == 502
+
+
+def test_concurrent_first_requests_share_one_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    created: List[UpstreamClient] = []
+    create_upstream_client = upstream_client.create_upstream_client
+
+    def counting_create_upstream_client() -> UpstreamClient:
+        client = create_upstream_client()
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(
+        upstream_client, "create_upstream_client", counting_create_upstream_client
+    )
+
+    async def run() -> List[UpstreamClient]:
+        try:
+            return list(
+                await asyncio.gather(*(main.get_upstream_client() for _ in range(8)))
+            )
+        finally:
+            await upstream_client.close_upstream_client()
+
+    clients = asyncio.run(run())
+
+    assert asyncio.iscoroutinefunction(main.get_upstream_client)
+    assert len(created) == 1
+    assert all(client is created[0] for client in clients)